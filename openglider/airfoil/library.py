@@ -0,0 +1,236 @@
+"""
+Local airfoil library: a directory of .dat-files packed into one indexed store.
+
+The store is a directory with all coordinates in one .npy-file (opened
+memory-mapped) and a json-index with the names, offsets and precomputed
+metrics (thickness, camber) of every airfoil:
+
+    library = AirfoilLibrary.build("airfoils/", "/tmp/airfoil_library")
+    library = AirfoilLibrary("/tmp/airfoil_library")
+    profile = library["naca2412"]
+    names = library.filter(thickness=(0.12, 0.16), camber=(None, 0.03))
+
+Build from the command line:
+
+    python -m openglider.airfoil.library build airfoils/ /tmp/airfoil_library
+"""
+import fnmatch
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from openglider.airfoil.metrics import get_metrics
+from openglider.airfoil.profile_2d import Profile2D
+
+
+def read_dat(filename):
+    """
+    Read an airfoil-file (selig- or lednicer-format)
+    :return: (title, points)
+    """
+    title = os.path.splitext(os.path.basename(filename))[0]
+    rows = []
+    with open(filename, "r") as dat_file:
+        for line in dat_file:
+            values = line.split()
+            try:
+                if len(values) != 2:
+                    raise ValueError
+                rows.append([float(values[0]), float(values[1])])
+            except ValueError:
+                if not rows and line.strip():
+                    title = line.strip()
+
+    points = np.array(rows, dtype=float).reshape(-1, 2)
+    if len(points) and points[0, 0] > 1.5:
+        # lednicer: number of points per side, upper and lower side from the nose
+        num_upper, num_lower = points[0].astype(int)
+        upper = points[1:num_upper + 1]
+        lower = points[num_upper + 1:num_upper + num_lower + 1]
+        if np.array_equal(upper[0], lower[0]):
+            lower = lower[1:]
+        points = np.concatenate([upper[::-1], lower])
+
+    if len(points) < 3:
+        raise ValueError("No airfoil in {}".format(filename))
+
+    return title, points
+
+
+class AirfoilLibrary(object):
+    """
+    An indexed store of airfoils
+    """
+    index_file = "index.json"
+    version = 1
+    metrics = ("thickness", "thickness_position", "camber", "camber_position")
+
+    def __init__(self, path, mmap=True):
+        self.path = path
+        with open(os.path.join(path, self.index_file), "r") as index_file:
+            index = json.load(index_file)
+        if index.get("version") != self.version:
+            raise ValueError("Unsupported airfoil library version: {}".format(index.get("version")))
+
+        self.skipped = []
+        self.names = index["names"]
+        self.titles = index["titles"]
+        self.offsets = np.array(index["offsets"], dtype=int)
+        for name in self.metrics:
+            setattr(self, name, np.array(index[name], dtype=float))
+
+        self.points = np.load(os.path.join(path, index["points"]), mmap_mode="r" if mmap else None)
+        self._numbers = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __contains__(self, name):
+        return name in self._numbers
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def get_points(self, name):
+        """
+        Return the (read-only) coordinates of an airfoil without copying
+        """
+        try:
+            number = self._numbers[name]
+        except KeyError:
+            raise KeyError("No airfoil named {} in the library".format(name))
+        return self.points[self.offsets[number]:self.offsets[number + 1]]
+
+    def get(self, name):
+        """
+        Return the airfoil as a Profile2D
+        """
+        return Profile2D(np.array(self.get_points(name)), name=name)
+
+    def get_profiles(self, names=None):
+        """
+        Return many (default: all) airfoils as Profile2D
+        """
+        if names is None:
+            names = self.names
+        return [self.get(name) for name in names]
+
+    def filter(self, name=None, **ranges):
+        """
+        Find airfoils by name-pattern and/or ranges of the stored metrics,
+        p.e. library.filter(name="naca*", thickness=(0.1, 0.14), camber=(None, 0.02))
+        :return: names of the matching airfoils
+        """
+        match = np.ones(len(self), dtype=bool)
+        for metric, (minimum, maximum) in ranges.items():
+            if metric not in self.metrics:
+                raise ValueError("Unknown metric: {} (available: {})".format(metric, ", ".join(self.metrics)))
+            values = getattr(self, metric)
+            if minimum is not None:
+                match &= values >= minimum
+            if maximum is not None:
+                match &= values <= maximum
+
+        names = [self.names[i] for i in np.flatnonzero(match)]
+        if name is not None:
+            names = fnmatch.filter(names, name)
+        return names
+
+    @classmethod
+    def build(cls, source, path, pattern="*.dat"):
+        """
+        Pack all airfoil-files of a directory (or a list of files) into a library at path.
+        Files that can not be read are skipped (library.skipped).
+        """
+        if isinstance(source, str):
+            filenames = sorted(os.path.join(source, filename) for filename in os.listdir(source)
+                               if fnmatch.fnmatch(filename.lower(), pattern.lower()))
+        else:
+            filenames = list(source)
+
+        index = {"version": cls.version, "names": [], "titles": [], "offsets": [0]}
+        index.update({name: [] for name in cls.metrics})
+        all_points = []
+        known_names = set()
+        skipped = []
+        for filename in filenames:
+            name = os.path.splitext(os.path.basename(filename))[0]
+            try:
+                if name in known_names:
+                    raise ValueError("Duplicate airfoil name: {}".format(name))
+                title, points = read_dat(filename)
+                metrics = get_metrics(Profile2D(points))
+            except (IOError, ValueError, IndexError) as e:
+                skipped.append((filename, str(e)))
+                continue
+
+            all_points.append(points)
+            known_names.add(name)
+            index["names"].append(name)
+            index["titles"].append(title)
+            index["offsets"].append(index["offsets"][-1] + len(points))
+            index["thickness"].append(metrics.max_thickness)
+            index["thickness_position"].append(metrics.max_thickness_position)
+            index["camber"].append(metrics.max_camber)
+            index["camber_position"].append(metrics.max_camber_position)
+
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+        # a new points-file for every build and the index last: readers always see a
+        # complete library (the old or the new one). The points of the previous build are
+        # kept for readers that loaded the old index just before, older ones are removed.
+        keep = set()
+        try:
+            with open(os.path.join(path, cls.index_file), "r") as index_file:
+                keep.add(json.load(index_file)["points"])
+        except (IOError, ValueError, KeyError):
+            pass
+
+        handle, points_name = tempfile.mkstemp(prefix="points_", suffix=".npy", dir=path)
+        with os.fdopen(handle, "wb") as outfile:
+            np.save(outfile, np.concatenate(all_points) if all_points else np.zeros((0, 2)))
+        index["points"] = os.path.basename(points_name)
+
+        handle, index_name = tempfile.mkstemp(suffix=".json", dir=path)
+        with os.fdopen(handle, "w") as outfile:
+            json.dump(index, outfile)
+        os.replace(index_name, os.path.join(path, cls.index_file))
+
+        keep.add(index["points"])
+        for filename in os.listdir(path):
+            if filename.startswith("points_") and filename not in keep:
+                try:
+                    os.remove(os.path.join(path, filename))
+                except OSError:
+                    pass  # still in use (windows), removed by a later build
+
+        library = cls(path)
+        library.skipped = skipped
+        return library
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="openglider airfoil library")
+    parser.add_argument("command", choices=["build", "info"])
+    parser.add_argument("path", help="directory of .dat-files (build) or library (info)")
+    parser.add_argument("target", nargs="?", help="library directory (build)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if args.target is None:
+            sys.exit("no library-directory given")
+        library = AirfoilLibrary.build(args.path, args.target)
+        for filename, error in library.skipped:
+            print("skipped {}: {}".format(filename, error))
+        print("{}: {} airfoils".format(args.target, len(library)))
+    else:
+        library = AirfoilLibrary(args.path)
+        print("{}: {} airfoils, {} points".format(args.path, len(library), len(library.points)))
@@ -0,0 +1,104 @@
+"""
+Geometric metrics of an airfoil (thickness, camber, area, nose radius, trailing edge angle).
+
+All metrics are computed in one vectorized pass and stored by the content
+fingerprint of the profile, so equal profiles share their metrics:
+
+    metrics = get_metrics(profile)
+    metrics.max_thickness, metrics.max_thickness_position
+"""
+import collections
+import threading
+
+import numpy as np
+
+
+class AirfoilMetrics(object):
+    """
+    Metrics of a Profile2D (in profile units)
+    """
+    nose_region = 0.005  # fraction of the chord used to fit the nose circle
+    te_distance = 0.01  # fraction of the chord to measure the trailing edge angle
+
+    def __init__(self, profile):
+        data = np.asarray(profile.data, dtype=float)
+        x_values = np.unique(np.abs(profile.x_values))
+        upper = profile.get_points(profile(-x_values))
+        lower = profile.get_points(profile(x_values))
+
+        thickness = upper[:, 1] - lower[:, 1]
+        #: [[x, thickness], ...]
+        self.thickness_distribution = np.array([x_values, thickness]).T
+        self.thickness_distribution.setflags(write=False)
+        self.max_thickness = float(thickness.max())
+        self.max_thickness_position = float(x_values[thickness.argmax()])
+
+        #: [[x, y], ...] points in the middle of the upper and lower side
+        self.camber_line = (upper + lower) / 2
+        self.camber_line.setflags(write=False)
+        self.max_camber = float(self.camber_line[:, 1].max())
+        self.max_camber_position = float(self.camber_line[self.camber_line[:, 1].argmax(), 0])
+
+        # shoelace (the trailing edge is closed with a straight line)
+        x, y = data.T
+        self.area = abs(float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))) / 2
+
+        nose = data[profile.noseindex]
+        chord = max(data[0, 0], data[-1, 0]) - nose[0]
+        self.le_radius = self._get_le_radius(data, profile.noseindex, nose[0] + self.nose_region * chord)
+        self.te_angle = self._get_te_angle(profile, data, chord)
+
+    @staticmethod
+    def _get_le_radius(data, noseindex, x_max):
+        """
+        Least-squares circle through the points in front of x_max (at least the nose and its neighbours)
+        """
+        region = np.flatnonzero(data[:, 0] <= x_max)
+        start = min(region.min(), noseindex - 1) if len(region) else noseindex - 1
+        stop = max(region.max(), noseindex + 1) if len(region) else noseindex + 1
+        points = data[max(start, 0):stop + 1]
+
+        # x^2 + y^2 = 2*a*x + 2*b*y + c  ->  r^2 = c + a^2 + b^2
+        matrix = np.column_stack([2 * points, np.ones(len(points))])
+        (a, b, c), _, _, _ = np.linalg.lstsq(matrix, np.sum(points**2, axis=1), rcond=None)
+        return float(np.sqrt(c + a**2 + b**2))
+
+    def _get_te_angle(self, profile, data, chord):
+        """
+        Angle between the upper and lower side, measured with secants from the
+        trailing edge to the points at te_distance (radians)
+        """
+        x = max(data[0, 0], data[-1, 0]) - self.te_distance * chord
+        upper = profile.get_points(profile(-x)) - data[0]
+        lower = profile.get_points(profile(x)) - data[-1]
+        angle = np.arctan2(upper[1], -upper[0]) - np.arctan2(lower[1], -lower[0])
+        return float(angle)
+
+
+max_cached = 1024  # number of stored metrics
+_metrics = collections.OrderedDict()
+_lock = threading.Lock()
+
+
+def get_metrics(profile):
+    """
+    Return the AirfoilMetrics of a profile, memoised on its content fingerprint
+    """
+    key = profile.fingerprint
+    with _lock:
+        metrics = _metrics.get(key)
+        if metrics is not None:
+            _metrics.move_to_end(key)
+            return metrics
+
+    metrics = AirfoilMetrics(profile)
+    with _lock:
+        _metrics[key] = metrics
+        while len(_metrics) > max_cached:
+            _metrics.popitem(last=False)
+    return metrics
+
+
+def clear_metrics():
+    with _lock:
+        _metrics.clear()
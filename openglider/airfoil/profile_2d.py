@@ -25,7 +25,8 @@ import numpy as np
 import tempfile
 import shutil
 
-from openglider.utils.cache import HashedList
+from openglider.airfoil.metrics import get_metrics
+from openglider.utils.cache import HashedList, cached_property, defer_invalidation
 from openglider.utils.distribution import Distribution
 from openglider.vector.functions import norm_squared
 from openglider.vector.polygon import Polygon2D
@@ -43,24 +44,46 @@ class Profile2D(Polygon2D):
         fakt = np.array([1, float(other)])
         return super(Profile2D, self).__imul__(fakt)
 
+    @cached_property('self')
+    def _x_index(self):
+        """
+        Monotone envelopes of the x-values to find the segments with searchsorted:
+            upper: running minimum from the trailing edge (point 1) to the nose
+            lower: running minimum from the trailing edge (point -2) back to the nose
+        """
+        x = self.data[:, 0]
+        upper = -np.minimum.accumulate(x[1:])  # negative x-values, as in the call
+        lower = np.minimum.accumulate(x[1:-1][::-1])[::-1]
+        return upper, lower
+
     def __call__(self, xval):
-        xval = float(xval)
-        if xval < 0.:       # LOWER
-            i = 1
-            xval = -xval
-            while self[i][0] >= xval and i < len(self):
-                i += 1
-            i -= 1
-        elif xval == 0:     # NOSE
-            i = self.noseindex - 1
-        else:               # UPPER
-            i = len(self) - 2
-            while self[i][0] > xval and i > 1:
-                i -= 1
-                # Determine k-value
-        k = -(self[i][0] - xval) / (self[i + 1][0] - self[i][0])
-
-        return i + k
+        """
+        Get the (fractional) index for one or many x-values (<0: upper side)
+        """
+        upper, lower = self._x_index
+        if np.ndim(xval) == 0:
+            xval = float(xval)
+            if xval < 0:
+                i = int(upper.searchsorted(xval, side="right"))
+            elif xval == 0:
+                i = self.noseindex - 1
+            else:
+                i = max(int(lower.searchsorted(xval, side="right")), 1)
+            i = min(i, len(self.data) - 2)
+            x = abs(xval)
+            x_i = self.data[i, 0]
+            return float(i + (x - x_i) / (self.data[i + 1, 0] - x_i))
+
+        xval_array = np.asarray(xval, dtype=float)
+        x = np.abs(xval_array)
+        i_upper = upper.searchsorted(xval_array, side="right")
+        i_lower = np.maximum(lower.searchsorted(x, side="right"), 1)
+        i = np.where(xval_array < 0, i_upper, i_lower)
+        i = np.where(xval_array == 0, self.noseindex - 1, np.minimum(i, len(self.data) - 2))
+
+        x_i = self.data[i, 0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return i + (x - x_i) / (self.data[i + 1, 0] - x_i)
 
     def align(self, p):
         """Align a point (x, y) on the airfoil. x: (0,1), y: (-1,1)"""
@@ -118,13 +141,10 @@ class Profile2D(Polygon2D):
         return first
 
     def __iadd__(self, other):
-        for i, point in enumerate(self.data):
-            if i > self.noseindex:
-                x = point[0]
-            else:
-                x = -point[0]
-
-            point[1] += other[other(x)][1]
+        data = self.data.copy()
+        x = np.where(np.arange(len(data)) > self.noseindex, data[:, 0], -data[:, 0])
+        data[:, 1] += other.get_points(other(x))[:, 1]
+        self.data = data
         return self
 
     @classmethod
@@ -240,7 +260,28 @@ class Profile2D(Polygon2D):
     @x_values.setter
     def x_values(self, xval):
         """Set X-Values of airfoil to defined points."""
-        self.data = [self[self(x)] for x in xval]
+        self.data = self.get_points(self(np.asarray(xval, dtype=float)))
+
+    @classmethod
+    def set_x_values_multiple(cls, profiles, xval):
+        """
+        Set the x-values of many profiles at once (same as profile.x_values = xval for every profile).
+        Profiles with the same number of points are resampled as one stacked array,
+        dependent objects are invalidated only once.
+        """
+        xval = np.asarray(xval, dtype=float)
+        profiles = list({id(profile): profile for profile in profiles}.values())
+
+        groups = {}
+        for profile in profiles:
+            groups.setdefault(len(profile.data), []).append(profile)
+
+        with defer_invalidation():
+            for group in groups.values():
+                data = np.array([profile.data for profile in group], dtype=float)
+                noseindices = np.array([profile.noseindex for profile in group])
+                for profile, points in zip(group, get_points_multiple(data, noseindices, xval)):
+                    profile.data = points
 
     @property
     def numpoints(self):
@@ -250,33 +291,31 @@ class Profile2D(Polygon2D):
     def numpoints(self, numpoints):
         self.x_values = Distribution.from_cos_distribution(numpoints)
 
-    #todo: cached
-    #@cached_property('self')
+    @property
+    def metrics(self):
+        """AirfoilMetrics (thickness, camber, area, nose radius,...), stored by the content of the profile"""
+        return get_metrics(self)
+
     @property
     def thickness(self):
         """return the maximum sickness (Sic!) of an airfoil"""
-        xvals = sorted(set(map(abs, self.x_values)))
-        return max([self[self(-i)][1] - self[self(i)][1] for i in xvals])
+        return self.metrics.max_thickness
 
     @thickness.setter
     def thickness(self, newthick):
         factor = float(newthick / self.thickness)
-        new = [point * [1., factor] for point in self.data]
-        name = self.name
-        if name is not None:
-            name += "_" + str(newthick) + "%"
-        self.__init__(new, name)
+        if self.name is not None:
+            self.name += "_" + str(newthick) + "%"
+        self.data = self.data * [1., factor]
 
     @property
     def camber_line(self):
-        xvals = sorted(set(map(abs, self.x_values)))
-        return np.array([self.profilepoint(i, 0.) for i in xvals])
+        return self.metrics.camber_line
 
-    #@cached_property('self')
     @property
     def camber(self):
         """return the maximum camber of the airfoil"""
-        return max([p[1] for p in self.camber_line])
+        return self.metrics.max_camber
 
     @camber.setter
     def camber(self, newcamber):
@@ -357,4 +396,50 @@ class Profile2D(Polygon2D):
             print('command xfoil is not available')
             return None
         from openglider.airfoil.XFoilCalc import calc_drag
-        return calc_drag(self, re, cl)
\ No newline at end of file
+        return calc_drag(self, re, cl)
+
+
+def searchsorted_rows(a, v):
+    """
+    np.searchsorted(a[i], v[i], side="right") for every row of the sorted 2d-array a
+    """
+    rows, num = a.shape
+    values = np.concatenate([a.ravel(), v.ravel()])
+    row_numbers = np.concatenate([np.repeat(np.arange(rows), num), np.repeat(np.arange(rows), v.shape[1])])
+    is_query = np.repeat([False, True], [a.size, v.size])
+    # queries after equal values (side="right")
+    order = np.lexsort((is_query, values, row_numbers))
+    count = np.cumsum(~is_query[order])
+    result = np.empty(len(values), dtype=int)
+    result[order] = count
+    return result[a.size:].reshape(v.shape) - np.arange(rows)[:, np.newaxis] * num
+
+
+def get_points_multiple(data, noseindices, xval):
+    """
+    Resample stacked profiles: the same as profile.get_points(profile(xval)) for every profile
+    :param data: profile-points (n_profiles, n_points, 2)
+    :param noseindices: noseindex of every profile
+    :param xval: x-values (<0: upper side)
+    :return: points (n_profiles, len(xval), 2)
+    """
+    num_profiles, num_points = data.shape[:2]
+    x_data = data[:, :, 0]
+    x = np.broadcast_to(np.abs(xval), (num_profiles, len(xval)))
+
+    upper = -np.minimum.accumulate(x_data[:, 1:], axis=1)
+    lower = np.minimum.accumulate(x_data[:, 1:-1][:, ::-1], axis=1)[:, ::-1]
+    i_upper = searchsorted_rows(upper, -x)
+    i_lower = np.maximum(searchsorted_rows(lower, x), 1)
+    i = np.where(xval < 0, i_upper, i_lower)
+    i = np.where(xval == 0, np.asarray(noseindices)[:, np.newaxis] - 1, np.minimum(i, num_points - 2))
+
+    rows = np.arange(num_profiles)[:, np.newaxis]
+    x_i = x_data[rows, i]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ik = i + (x - x_i) / (x_data[rows, i + 1] - x_i)
+
+    # as in get_points
+    i = np.clip(np.floor(ik), 0, num_points - 2).astype(int)
+    k = (ik - i)[..., np.newaxis]
+    return data[rows, i] + k * (data[rows, i + 1] - data[rows, i])
@@ -7,6 +7,12 @@ from openglider.utils import Config
 class GlobalConfig(Config):
     asinc_interpolation_points = 1000
     caching = True
+    cache_max_bytes = None  # memory budget for cached values (None: unlimited)
+    cache_eviction = "lru"  # lru / cost
+    cache_threadsafe = False  # compute cached values only once when using threads
+    persistent_cache = None  # directory for the on-disk cache (None: disabled)
+    persistent_cache_max_bytes = 2**30
+    bulk_dtype = None  # dtype of bulk derived data (midribs, pattern outlines), p.e. "float32" (None: float64)
     debug = False
     json_allowed_modules = [r"openglider\..*"]
     json_forbidden_modules = [r".*eval", r".*subprocess.*"]
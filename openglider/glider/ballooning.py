@@ -18,6 +18,7 @@
 # You should have received a copy of the GNU General Public License
 # along with OpenGlider.  If not, see <http://www.gnu.org/licenses/>.
 import copy
+import threading
 
 import numpy as np
 
@@ -31,12 +32,21 @@ class ArcSinc:
         self.start = 0.
         self.end = np.pi
         self.arsinc = None
+        self._lock = threading.Lock()
 
     def __call__(self, val):
         if self.arsinc is None:
-            self.interpolate(openglider.config['asinc_interpolation_points'])
+            self.prepare()
         return self.arsinc(val)
 
+    def prepare(self):
+        """
+        Build the interpolation once (call before using it from several threads)
+        """
+        with self._lock:
+            if self.arsinc is None:
+                self.interpolate(openglider.config['asinc_interpolation_points'])
+
     def interpolate(self, numpoints):
         data = []
 
@@ -57,6 +67,7 @@ class ArcSinc:
 
 class Ballooning(object):
     arcsinc = ArcSinc()
+    arcsinc.prepare()  # shared by all threads, so build it before any of them uses it
 
     def __init__(self, f_upper, f_lower):
         self.upper = f_upper
@@ -83,20 +94,16 @@ class Ballooning(object):
 
     def __add__(self, other):
         """Add another Ballooning to this one, needed for merging purposes"""
-        upper = []
-        for point in self.upper.data:
-            upper.append([point[0], point[1]+other.upper(point[0])])
-        lower = []
-        for point in self.lower.data:
-            lower.append([point[0], point[1]+other.lower(point[0])])
+        upper = self.upper.data.copy()
+        upper[:, 1] += other.upper(upper[:, 0])
+        lower = self.lower.data.copy()
+        lower[:, 1] += other.lower(lower[:, 0])
 
         return Ballooning(Interpolation(upper), Interpolation(lower))
 
     def __imul__(self, val):
-        for point in self.upper.data:
-            point[1] *= val
-        for point in self.lower.data:
-            point[1] *= val
+        self.upper.data = self.upper.data * [1, val]
+        self.lower.data = self.lower.data * [1, val]
         return self
 
     def __mul__(self, value):
@@ -117,7 +124,17 @@ class Ballooning(object):
         return cls.arcsinc(baloon)
 
     def mapx(self, xvals):
-        return [self[i] for i in xvals]
+        """Get Ballooning Values (%) for many XValues at once"""
+        xvals = np.asarray(xvals, dtype=float)
+        if np.any((xvals < -1) | (xvals > 1)):
+            raise ValueError("Ballooning only between -1 and 1")
+        upper = xvals < 0
+        values = np.empty(xvals.shape)
+        if np.any(upper):
+            values[upper] = self.upper(-xvals[upper])
+        if not np.all(upper):
+            values[~upper] = self.lower(xvals[~upper])
+        return values
 
     @property
     def amount_maximal(self):
@@ -4,6 +4,7 @@ import math
 import numpy as np
 from openglider.airfoil import Profile3D
 from openglider.utils.cache import CachedObject, cached_property
+from openglider.utils.persistent_cache import persistent
 from openglider.vector import normalize, norm
 
 
@@ -29,45 +30,49 @@ class BasicCell(CachedObject):
         elif y_value == 1:            # right side
             return self.prof2
         else:                   # somewhere else
-            #self._checkxvals()
-            midrib = []
+            return self._get_midrib(y_value, ballooning, arc_argument, with_numpy)
 
-            # Ballooning is considered to be arcs, following 2 (two!) simple rules:
-            # 1: x1 = x*d
-            # 2: x2 = R*normvekt*(cos(phi2)-cos(phi)
-            # 3: norm(d)/r*(1-x) = 2*sin(phi(2))
-            if with_numpy:
-                l_phi = np.array(self.ballooning_phi)
-                l_n = np.array(self.normvectors)
-                l_r = np.array(self.ballooning_radius)
-                l_diff = self.prof1.data - self.prof2.data
+    @persistent('prof1', 'prof2', 'ballooning_phi')
+    def _get_midrib(self, y_value, ballooning, arc_argument, with_numpy):
+        #self._checkxvals()
+        midrib = []
 
-                l_phi = l_phi  + (1e-10 - l_phi) * (l_phi <= 0.)
-                l_psi = l_phi * 2 * y_value
-                l_h = np.cos(l_phi - l_psi) - np.cos(l_phi)
-                l_d = 0.5 * (1 - np.sin(l_phi - l_psi) / np.sin(l_phi))
-                l_r = l_r * (l_r > 0.)
-                l_midrib = self.prof1.data.T - l_d * l_diff.T + (l_h * l_r) * l_n.T
-                return Profile3D(l_midrib.T)
+        # Ballooning is considered to be arcs, following 2 (two!) simple rules:
+        # 1: x1 = x*d
+        # 2: x2 = R*normvekt*(cos(phi2)-cos(phi)
+        # 3: norm(d)/r*(1-x) = 2*sin(phi(2))
+        if with_numpy:
+            l_phi = np.array(self.ballooning_phi)
+            l_n = np.array(self.normvectors)
+            l_r = np.array(self.ballooning_radius)
+            l_diff = self.prof1.data - self.prof2.data
 
-            for i, _ in enumerate(self.prof1.data):  # Arc -> phi(bal) -> r  # oder so...
-                diff = self.prof1[i] - self.prof2[i]
-                if ballooning and self.ballooning_radius[i] > 0.:
-                    phi = self.ballooning_phi[i]    # phi is half only the half
-                    if arc_argument:
-                        psi = phi * 2 * y_value         # psi [-phi:phi]
-                        d = 0.5 - 0.5 * math.sin(phi - psi) / math.sin(phi)
-                        h = math.cos(phi - psi) - math.cos(phi)
-                    else:
-                        d = y_value
-                        h = math.cos(math.asin((2 * d - 1) * math.sin(phi))) -  math.cos(phi)
-                else:  # Without ballooning
+            l_phi = l_phi  + (1e-10 - l_phi) * (l_phi <= 0.)
+            l_psi = l_phi * 2 * y_value
+            l_h = np.cos(l_phi - l_psi) - np.cos(l_phi)
+            l_d = 0.5 * (1 - np.sin(l_phi - l_psi) / np.sin(l_phi))
+            l_r = l_r * (l_r > 0.)
+            l_midrib = self.prof1.data.T - l_d * l_diff.T + (l_h * l_r) * l_n.T
+            return Profile3D(l_midrib.T)
+
+        for i, _ in enumerate(self.prof1.data):  # Arc -> phi(bal) -> r  # oder so...
+            diff = self.prof1[i] - self.prof2[i]
+            if ballooning and self.ballooning_radius[i] > 0.:
+                phi = self.ballooning_phi[i]    # phi is half only the half
+                if arc_argument:
+                    psi = phi * 2 * y_value         # psi [-phi:phi]
+                    d = 0.5 - 0.5 * math.sin(phi - psi) / math.sin(phi)
+                    h = math.cos(phi - psi) - math.cos(phi)
+                else:
                     d = y_value
-                    h = 0.
-                midrib.append(self.prof1[i] - diff * d +
-                              self.normvectors[i] * h * self.ballooning_radius[i])
+                    h = math.cos(math.asin((2 * d - 1) * math.sin(phi))) -  math.cos(phi)
+            else:  # Without ballooning
+                d = y_value
+                h = 0.
+            midrib.append(self.prof1[i] - diff * d +
+                          self.normvectors[i] * h * self.ballooning_radius[i])
 
-            return Profile3D(midrib)
+        return Profile3D(midrib)
 
     @cached_property('prof1', 'prof2')
     def normvectors(self, j=None):
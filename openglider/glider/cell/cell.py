@@ -2,11 +2,13 @@ from __future__ import division
 import copy
 import numpy as np
 
+import openglider
 from openglider.airfoil import Profile3D
 from openglider.glider.ballooning import Ballooning
 from openglider.glider.cell import BasicCell
 from openglider.utils import consistent_value, linspace
 from openglider.utils.cache import CachedObject, cached_property, HashedList
+from openglider.utils.persistent_cache import persistent
 from openglider.vector import norm
 from openglider.mesh import Mesh, Vertex, Polygon
 
@@ -167,13 +169,22 @@ class Cell(CachedObject):
 
     def get_midribs(self, numribs):
         y_values = linspace(0, 1, numribs)
-        return [self.midrib(y) for y in y_values]
+        midribs = [self.midrib(y) for y in y_values]
+        dtype = openglider.config["bulk_dtype"]
+        if dtype is not None:
+            # the outer ribs are the profiles of the cell itself
+            midribs = [midrib.copy().set_dtype(dtype) for midrib in midribs]
+        return midribs
 
     @cached_property('ballooning', 'rib1.profile_2d.numpoints', 'rib2.profile_2d.numpoints')
+    @persistent('ballooning', 'rib1.profile_2d.x_values', lambda cell: openglider.config['asinc_interpolation_points'])
     def ballooning_phi(self):
         x_values = self.rib1.profile_2d.x_values
-        balloon = [self.ballooning[i] for i in x_values]
-        return HashedList([Ballooning.arcsinc(1. / (1+bal)) if bal > 0 else 0 for bal in balloon])
+        balloon = self.ballooning.mapx(x_values)
+        phi = np.zeros(len(balloon))
+        positive = balloon > 0
+        phi[positive] = Ballooning.arcsinc(1. / (1+balloon[positive]))
+        return HashedList(phi)
 
     @property
     def ribs(self):
@@ -185,20 +196,16 @@ class Cell(CachedObject):
 
     @property
     def area(self):
-        p1_1 = self.rib1.align([0, 0, 0])
-        p1_2 = self.rib1.align([1, 0, 0])
-        p2_1 = self.rib2.align([0, 0, 0])
-        p2_2 = self.rib2.align([1, 0, 0])
+        p1_1, p1_2 = self.rib1.align_all([[0, 0], [1, 0]])
+        p2_1, p2_2 = self.rib2.align_all([[0, 0], [1, 0]])
         return 0.5 * (norm(np.cross(p1_2 - p1_1, p2_1 - p1_1)) + norm(np.cross(p2_2 - p2_1, p2_2 - p1_2)))
 
     @property
     def projected_area(self):
         """ return the z component of the crossproduct
             of the cell diagonals"""
-        p1_1 = np.array(self.rib1.align([0, 0, 0]))
-        p1_2 = np.array(self.rib1.align([1, 0, 0]))
-        p2_1 = np.array(self.rib2.align([0, 0, 0]))
-        p2_2 = np.array(self.rib2.align([1, 0, 0]))
+        p1_1, p1_2 = self.rib1.align_all([[0, 0], [1, 0]])
+        p2_1, p2_2 = self.rib2.align_all([[0, 0], [1, 0]])
         return -0.5 * np.cross(p2_1 - p1_2, p2_2 - p1_1)[-1]
 
     @property
@@ -25,7 +25,7 @@ import numpy as np
 
 from openglider.airfoil import get_x_value
 from openglider.mesh import Mesh
-from openglider.vector import norm
+from openglider.vector import norm, PolyLine
 from openglider.vector.projection import flatten_list
 from openglider.utils import Config
 
@@ -124,19 +124,21 @@ class DiagonalRib(object):
             number_array = []
             # create array of points
             # the outermost points build the segments
+            if not isinstance(left, PolyLine):
+                left = PolyLine(left)
+            if not isinstance(right, PolyLine):
+                right = PolyLine(right)
             n_l = len(left)
             n_r = len(right)
             count = 0
             for y_pos in np.linspace(0., 1., insert_points + 2):
                 # from left to right
-                point_line = []
-                number_line = []
                 num_points = int(n_l * (1. - y_pos) + n_r * y_pos)
-                for x_pos in np.linspace(0., 1., num_points):
-                    point_line.append(left[x_pos * (n_l - 1)] * (1. - y_pos) +
-                                      right[x_pos * (n_r - 1)] * y_pos)
-                    number_line.append(count)
-                    count += 1
+                x_pos = np.linspace(0., 1., num_points)  # adding points to line
+                point_line = list(left.get_points(x_pos * (n_l - 1)) * (1. - y_pos) +
+                                  right.get_points(x_pos * (n_r - 1)) * y_pos)
+                number_line = list(range(count, count + num_points))
+                count += num_points
                 point_array.append(point_line)
                 number_array.append(number_line)
             edge = number_array[0]
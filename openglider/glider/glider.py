@@ -19,18 +19,22 @@
 # along with OpenGlider.  If not, see <http://www.gnu.org/licenses/>.
 from __future__ import division
 
+import concurrent.futures
 import copy
 import math
 
 import numpy as np
 
+import openglider
+from openglider.airfoil import Profile2D
 from openglider.glider.in_out import IMPORT_GEOMETRY, EXPORT_3D
 from openglider.glider.shape import Shape
 from openglider.mesh import Mesh
-from openglider.utils import consistent_value
+from openglider.utils import cache, consistent_value
 from openglider.utils.distribution import Distribution
 from openglider.vector.functions import norm, rotation_2d
 from openglider.vector.projection import flatten_list
+from openglider.vector.transformation import TransformationStack
 
 
 class Glider(object):
@@ -117,6 +121,22 @@ class Glider(object):
 
         return panels
 
+    def map_cells(self, function, threads=None):
+        """
+        Apply function to every cell, optionally using a pool of threads.
+        The cache is used in thread-safe mode meanwhile, so every cached
+        value is computed only once.
+        :param function: function(cell)
+        :param threads: number of threads (None: no threads)
+        :return: list of results
+        """
+        if not threads or threads < 2:
+            return [function(cell) for cell in self.cells]
+
+        with cache.cache_store.threadsafe():
+            with concurrent.futures.ThreadPoolExecutor(threads) as executor:
+                return list(executor.map(function, self.cells))
+
     def get_mesh(self, midribs=0):
         mesh = sum([Mesh.from_rib(rib, filled=True) for rib in self.ribs], Mesh())
 
@@ -165,22 +185,29 @@ class Glider(object):
 
         return Mesh.from_indexed(np.concatenate(ribs), {"hull": polygons}, boundary)
 
-    def return_ribs(self, num=0, ballooning=True):
+    def return_ribs(self, num=0, ballooning=True, threads=None):
         """
         Get a list of rib-curves
         :param num: number of midribs per cell
         :param ballooning: calculate ballooned cells
+        :param threads: number of threads to compute the cells with
         :return: nested list of ribs [[[x,y,z],p2,p3...],rib2,rib3,..]
         """
         num += 1
         if not self.cells:
             return np.array([])
+
+        dtype = openglider.config["bulk_dtype"]
+
+        def get_midribs(cell):
+            return [np.asarray(cell.midrib(y * 1. / num, ballooning=ballooning).data, dtype=dtype)
+                    for y in range(num)]
+
         #will hold all the points
         ribs = []
-        for cell in self.cells:
-            for y in range(num):
-                ribs.append(cell.midrib(y * 1. / num, ballooning=ballooning).data)
-        ribs.append(self.cells[-1].midrib(1.).data)
+        for cell_ribs in self.map_cells(get_midribs, threads):
+            ribs += cell_ribs
+        ribs.append(np.asarray(self.cells[-1].midrib(1.).data, dtype=dtype))
         return ribs
 
     def apply_mean_ribs(self, num_mean=8):
@@ -338,8 +365,7 @@ class Glider(object):
 
     @profile_x_values.setter
     def profile_x_values(self, xvalues):
-        for rib in self.ribs:
-            rib.profile_2d.x_values = xvalues
+        Profile2D.set_x_values_multiple([rib.profile_2d for rib in self.ribs], xvalues)
 
     @property
     def span(self):
@@ -400,7 +426,35 @@ class Glider(object):
         if x == 0:
             return copy.deepcopy([rib.pos for rib in self.ribs])  # This is much faster
         else:
-            return [rib.align([x, 0, 0]) for rib in self.ribs]
+            ribs = self.ribs
+            points = np.tile([[[x, 0., 0.]]], (len(ribs), 1, 1))
+            return list(self.get_rib_transformations(ribs).apply(points)[:, 0])
+
+    def get_rib_transformations(self, ribs=None):
+        """
+        Transformations of all ribs as one stack
+        """
+        ribs = ribs or self.ribs
+        return TransformationStack.from_transformations([rib.transformation for rib in ribs])
+
+    def get_rib_points(self):
+        """
+        Align all rib-profiles at once (the profiles need the same number of points)
+        :return: (profiles [n_ribs, n_points, 3], leading_edge [n_ribs, 3], trailing_edge [n_ribs, 3])
+        """
+        ribs = self.ribs
+        if not ribs:
+            return np.zeros((0, 0, 3)), np.zeros((0, 3)), np.zeros((0, 3))
+        try:
+            profiles = np.array([rib.profile_2d.data for rib in ribs], dtype=float)
+        except ValueError:
+            raise ValueError("All profiles need the same number of points")
+
+        edges = np.tile([[0., 0.], [1., 0.]], (len(ribs), 1, 1))
+        points = np.concatenate([profiles, edges], axis=1)
+        points = np.concatenate([points, np.zeros(points.shape[:2] + (1,))], axis=2)  # z=0
+        points = self.get_rib_transformations(ribs).apply(points)
+        return points[:, :-2], points[:, -2], points[:, -1]
 
     @property
     def attachment_points(self):
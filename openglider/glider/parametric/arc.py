@@ -8,7 +8,7 @@ class ArcCurve(object):
     """
     _
     """
-    num_interpolation_points = 50
+    tolerance = 3e-4  # chordal tolerance to sample the curve
 
     def __init__(self, curve):
         self.curve = curve
@@ -28,11 +28,11 @@ class ArcCurve(object):
         :return: [p0, p1,...]
         """
         # Symmetric-Bezier-> start from 0.5
-        arc_curve = PolyLine2D([self.curve(i) for i in np.linspace(0.5, 1, self.num_interpolation_points)])
+        arc_curve = PolyLine2D(self.curve.get_adaptive_sequence(self.tolerance, 0.5, 1.))
         arc_curve_length = arc_curve.get_length()
         scale_factor = arc_curve_length / x_values[-1]
-        _positions = [arc_curve.extend(0, x * scale_factor) for x in x_values]
-        positions = PolyLine2D([arc_curve[p] for p in _positions])
+        _positions = arc_curve.extend(0, np.array(x_values) * scale_factor)
+        positions = PolyLine2D(arc_curve.get_points(_positions))
         if not self.has_center_cell(x_values):
             positions[0][0] = 0
         # rescale
@@ -19,16 +19,13 @@ def fit_glider_3d(cls, glider, numpoints=3):
     aoa = [[front[i][0], rib.aoa_relative] for i, rib in enumerate(glider.ribs)]
     zrot = [[front[i][0], rib.zrot] for i, rib in enumerate(glider.ribs)]
 
-    def symmetric_fit(polyline, numpoints=numpoints):
+    def symmetric(polyline):
         mirrored = PolyLine2D(polyline[1:]).mirror([0, 0], [0, 1])
-        symmetric = mirrored[::-1].join(polyline[int(glider.has_center_cell):])
-        return SymmetricBezier.fit(symmetric, numpoints=numpoints)
-
-    front_bezier = symmetric_fit(front)
-    back_bezier = symmetric_fit(back)
-    arc_bezier = symmetric_fit(arc)
-    aoa_bezier = symmetric_fit(aoa)
-    zrot_bezier = symmetric_fit(zrot)
+        return mirrored[::-1].join(polyline[int(glider.has_center_cell):]).data
+
+    # all curves have one point per rib -> fit them at once
+    front_bezier, back_bezier, arc_bezier, aoa_bezier, zrot_bezier = SymmetricBezier.fit_multiple(
+        [symmetric(line) for line in (front, back, arc, aoa, zrot)], numpoints=numpoints)
 
     cell_num = len(glider.cells) * 2 - glider.has_center_cell
 
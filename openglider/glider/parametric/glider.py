@@ -1,6 +1,8 @@
 from __future__ import division
 
 import math
+import warnings
+
 import numpy as np
 
 from openglider.airfoil import Profile2D
@@ -26,7 +28,6 @@ class ParametricGlider(object):
     num_interpolate_ribs = 40
     num_cell_dist = 30
     num_depth_integral = 100
-    num_interpolate = 30
     num_profile = None
 
     def __init__(self, shape, arc, aoa, profiles, profile_merge_curve,
@@ -245,7 +246,7 @@ class ParametricGlider(object):
 
     def apply_arc(self, glider):
         for rib, rib_pos in zip(glider.ribs, self.arc.get_arc_positions(self.shape.rib_x_values)):
-            rib.pos[2] = rib_pos[1]
+            rib.pos = np.array([rib.pos[0], rib.pos[1], rib_pos[1]])
 
     @classmethod
     def fit_glider_3d(cls, glider, numpoints=3):
@@ -258,22 +259,24 @@ class ParametricGlider(object):
         """
 
     def get_aoa(self):
-        aoa_interpolation = self.aoa.interpolation(num=self.num_interpolate)
-
-        return [aoa_interpolation(x) for x in self.shape.rib_x_values]
+        return list(self.aoa.y_at_x(self.shape.rib_x_values))
 
 
-    def apply_aoa(self, glider, interpolation_num=50):
-        aoa_interpolation = self.aoa.interpolation(num=interpolation_num)
-        for rib, x_pos in zip(glider.ribs, self.shape.rib_x_values):
-            rib.aoa_relative = aoa_interpolation(x_pos)
+    def apply_aoa(self, glider, interpolation_num=None):
+        if interpolation_num is not None:
+            warnings.warn("apply_aoa: interpolation_num is not used anymore, the aoa-curve is evaluated exactly",
+                          DeprecationWarning, stacklevel=2)
+        for rib, aoa in zip(glider.ribs, self.aoa.y_at_x(self.shape.rib_x_values)):
+            rib.aoa_relative = aoa
 
     def get_profile_merge(self):
-        profile_merge_curve = self.profile_merge_curve.interpolation(num=self.num_interpolate)
-        return [profile_merge_curve(abs(x)) for x in self.shape.rib_x_values]
+        return list(self.profile_merge_curve.y_at_x(np.abs(self.shape.rib_x_values)))
 
-    def get_glider_3d(self, glider=None, num=50, num_profile=None):
+    def get_glider_3d(self, glider=None, num=None, num_profile=None):
         """returns a new glider from parametric values"""
+        if num is not None:
+            warnings.warn("get_glider_3d: num is not used anymore, the curves are evaluated exactly",
+                          DeprecationWarning, stacklevel=2)
         glider = glider or Glider()
         ribs = []
 
@@ -282,10 +285,9 @@ class ParametricGlider(object):
         x_values = self.shape.rib_x_values
         shape_ribs = self.shape.ribs
 
-        profile_merge_curve = self.profile_merge_curve.interpolation(num=num)
-        ballooning_merge_curve = self.ballooning_merge_curve.interpolation(num=num)
-        aoa_int = self.aoa.interpolation(num=num)
-        zrot_int = self.zrot.interpolation(num=num)
+        profile_factors = self.profile_merge_curve.y_at_x(np.abs(x_values))
+        aoa_values = self.aoa.y_at_x(x_values)
+        zrot_values = self.zrot.y_at_x(x_values)
 
         arc_pos = list(self.arc.get_arc_positions(x_values))
         rib_angles = self.arc.get_rib_angles(x_values)
@@ -306,8 +308,7 @@ class ParametricGlider(object):
             startpoint = np.array([-front[1] + offset_x, arc[0], arc[1]])
 
             chord = abs(front[1]-back[1])
-            factor = profile_merge_curve(abs(pos))
-            profile = self.get_merge_profile(factor)
+            profile = self.get_merge_profile(profile_factors[rib_no])
             profile.name = "Profile{}".format(rib_no)
             profile.x_values = profile_x_values
 
@@ -320,13 +321,13 @@ class ParametricGlider(object):
                 chord=chord,
                 arcang=rib_angles[rib_no],
                 glide=self.glide,
-                aoa_absolute=aoa_int(pos),
-                zrot=zrot_int(pos),
+                aoa_absolute=aoa_values[rib_no],
+                zrot=zrot_values[rib_no],
                 holes=this_rib_holes,
                 rigidfoils=this_rigid_foils,
                 name="rib{}".format(rib_no)
             ))
-            ribs[-1].aoa_relative = aoa_int(pos)
+            ribs[-1].aoa_relative = aoa_values[rib_no]
 
         if self.shape.has_center_cell:
             new_rib = ribs[0].copy()
@@ -337,9 +338,9 @@ class ParametricGlider(object):
             cell_centers.insert(0, 0.)
 
         glider.cells = []
+        ballooning_factors = self.ballooning_merge_curve.y_at_x(cell_centers)
         for cell_no, (rib1, rib2) in enumerate(zip(ribs[:-1], ribs[1:])):
-            ballooning_factor = ballooning_merge_curve(cell_centers[cell_no])
-            ballooning = self.merge_ballooning(ballooning_factor)
+            ballooning = self.merge_ballooning(ballooning_factors[cell_no])
             cell = Cell(rib1, rib2, ballooning, name="c{}".format(cell_no+1))
 
             glider.cells.append(cell)
@@ -413,7 +414,8 @@ class ParametricGlider(object):
         def rescale(curve):
             span_orig = curve.controlpoints[-1][0]
             factor = span/span_orig
-            curve._data[:, 0] *= factor
+            if factor != 1:  # keep the cached values of the curve
+                curve.data = curve.data * [factor, 1]
 
         rescale(self.ballooning_merge_curve)
         rescale(self.profile_merge_curve)
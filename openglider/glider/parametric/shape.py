@@ -3,13 +3,11 @@ import math
 import numpy as np
 
 from openglider.glider.shape import Shape
-from openglider.vector import Interpolation, PolyLine2D
+from openglider.vector import PolyLine2D
 from openglider.utils.table import Table
 
 
 class ParametricShape(object):
-    num_shape_interpolation = 50
-    num_distribution_interpolation = 50
     num_depth_integral = 50
     baseline_pos = 0.25
 
@@ -64,19 +62,17 @@ class ParametricShape(object):
         """
         Interpolate Cell-distribution
         """
-        data = self.rib_distribution.get_sequence(self.num_distribution_interpolation)
-        interpolation = Interpolation([[p[1], p[0]] for p in data])
         start = self.has_center_cell / self.cell_num
         num = self.cell_num // 2 + 1
-        return [[interpolation(i), i] for i in np.linspace(start, 1, num)]
+        y_values = np.linspace(start, 1, num)
+        return [[x, y] for x, y in zip(self.rib_distribution.x_at_y(y_values), y_values)]
 
     @property
     def fast_interpolation(self):
-        data = self.rib_distribution.get_sequence(self.num_distribution_interpolation).T
         start = self.has_center_cell / self.cell_num
         num = self.cell_num // 2 + 1
         positions = np.linspace(start, 1, num)
-        return np.array([np.interp(positions, data[1], data[0]), positions]).T
+        return np.array([self.rib_distribution.x_at_y(positions), positions]).T
 
     # besser mit spezieller bezier?
     @property
@@ -97,12 +93,9 @@ class ParametricShape(object):
         Return shape of the glider:
         [ribs, front, back]
         """
-        num = self.num_shape_interpolation
-        front_int = self.front_curve.interpolation(num=num)
-        back_int = self.back_curve.interpolation(num=num)
         dist = self.rib_x_values
-        front = [[x, front_int(x)] for x in dist]
-        back = [[x, back_int(x)] for x in dist]
+        front = np.array([dist, self.front_curve.y_at_x(dist)]).T
+        back = np.array([dist, self.back_curve.y_at_x(dist)]).T
 
         return Shape(PolyLine2D(front), PolyLine2D(back))
 
@@ -155,12 +148,10 @@ class ParametricShape(object):
         """
         num = self.num_depth_integral
         x_values = np.linspace(0, self.span, num)
-        front_int = self.front_curve.interpolation(num=num)
-        back_int = self.back_curve.interpolation(num=num)
+        depth = self.front_curve.y_at_x(x_values) - self.back_curve.y_at_x(x_values)
         integrated_depth = [0.]
-        for x in x_values[1:]:
-            depth = front_int(x) - back_int(x)
-            integrated_depth.append(integrated_depth[-1] + 1. / depth)
+        for x_depth in depth[1:]:
+            integrated_depth.append(integrated_depth[-1] + 1. / x_depth)
         y_values = [i / integrated_depth[-1] for i in integrated_depth]
         return zip(x_values, y_values)
 
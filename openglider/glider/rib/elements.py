@@ -90,7 +90,7 @@ class RigidFoil(object):
 
             last_node = p
 
-        indices = [profile(x) for x in point_range]
+        indices = profile(np.array(point_range))
 
         return [(profile[index] - profile_normvectors[index]*self.func(x))*rib.chord for index, x in zip(indices, point_range)]
 
@@ -4,6 +4,7 @@ import math
 import numpy as np
 from openglider.airfoil import Profile3D
 from openglider.utils.cache import CachedObject, cached_property
+from openglider.utils.persistent_cache import persistent
 from openglider.vector.functions import rotation_3d, set_dimension
 from openglider.vector.transformation import Rotation, Scale, Translation
 from openglider.glider.rib.elements import FoilCurve
@@ -101,6 +102,7 @@ class Rib(CachedObject):
         return rib_transformation(self.aoa_absolute, self.arcang, zrot, self.xrot, self.chord, self.pos)
 
     @cached_property('self')
+    @persistent('profile_2d', 'aoa_absolute', 'arcang', 'zrot', 'xrot', 'glide', 'chord', 'pos')
     def profile_3d(self):
         if self.profile_2d.data is not None:
             return Profile3D(self.align_all(self.profile_2d.data))
@@ -19,12 +19,14 @@
 # along with OpenGlider.  If not, see <http://www.gnu.org/licenses/
 from __future__ import division
 import sys
+import threading
 
 from openglider.vector import Interpolation
 
 
 class LineType():
     types = {}
+    _lock = threading.Lock()
 
     def __init__(self, name, thickness, stretch_curve, min_break_load=None, cw=1.1):
         """
@@ -37,7 +39,6 @@ class LineType():
             - resistance: minimal break strength
         """
         self.name = name
-        self.types[name] = self
         self.cw = cw
         self.thickness = thickness / 1000
         if stretch_curve[0][0] != 0:
@@ -47,6 +48,10 @@ class LineType():
 
         self.min_break_load = min_break_load
 
+        # register when complete, so other threads never see a half-built type
+        with self._lock:
+            self.types[name] = self
+
     def get_stretch_factor(self, force):
         return 1 + self.stretch_interpolation(force) / 100
 
@@ -2,6 +2,8 @@ from __future__ import division
 
 import numpy as np
 
+from openglider.vector import PolyLine
+
 try:
     import meshpy.triangle as mptriangle
     from openglider.mesh.meshpy_triangle import custom_triangulation
@@ -209,19 +211,21 @@ class Mesh(object):
             number_array = []
             # create array of points
             # the outermost points build the segments
+            if not isinstance(left, PolyLine):
+                left = PolyLine(left)
+            if not isinstance(right, PolyLine):
+                right = PolyLine(right)
             n_l = len(left)
             n_r = len(right)
             count = 0
             for y_pos in np.linspace(0., 1., insert_points + 2):
                 # from left to right, from rib1 to rib2
-                point_line = []
-                number_line = []
                 num_points = int(n_l * (1. - y_pos) + n_r * y_pos)
-                for x_pos in np.linspace(0., 1., num_points): # adding point to line
-                    point_line.append(left[x_pos * (n_l - 1)] * (1. - y_pos) +
-                                      right[x_pos * (n_r - 1)] * y_pos)
-                    number_line.append(count)
-                    count += 1
+                x_pos = np.linspace(0., 1., num_points)  # adding points to line
+                point_line = list(left.get_points(x_pos * (n_l - 1)) * (1. - y_pos) +
+                                  right.get_points(x_pos * (n_r - 1)) * y_pos)
+                number_line = list(range(count, count + num_points))
+                count += num_points
                 point_array.append(point_line)
                 number_array.append(number_line)
             # edge = number_array[0]
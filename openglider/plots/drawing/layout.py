@@ -33,6 +33,11 @@ class Layout(object):
     def __json__(self):
         return {"parts": self.parts}
 
+    def set_dtype(self, dtype):
+        for part in self.parts:
+            part.set_dtype(dtype)
+        return self
+
     def copy(self):
         return self.__class__([p.copy() for p in self.parts])
 
@@ -2,6 +2,8 @@ import copy
 
 import numpy as np
 
+from openglider.vector.functions import rotation_2d
+
 
 class Layer(object):
     stroke = "black"
@@ -106,7 +108,13 @@ class Layers(object):
 
 
 class PlotPart(object):
+    """
+    Transformations (rotate, move, scale) are collected in one matrix and applied to
+    all lines at once (as one contiguous array) when the layers are accessed.
+    """
     def __init__(self, cuts=None, marks=None, text=None, stitches=None, name=None, material_code="", **layers):
+        self._matrix = np.identity(3)
+        self._buffer = None
         self.layers = Layers()
         self.layers.add("cuts", stroke="red")
         self.layers.add("marks", stroke="green")
@@ -137,39 +145,85 @@ class PlotPart(object):
     def copy(self):
         return copy.deepcopy(self)
 
-    def max_function(self, axis, layer):
-        start = float("-Inf")
-        if layer:
-            for line in layer:
-                if line:
-                    values = [p[axis] for p in line]
-                    start = max(start, max(values))
-        return start
-
-    def min_function(self, axis, layer):
-        start = float("Inf")
-        if layer:
+    @property
+    def layers(self):
+        """
+        The layers of the part (all pending transformations are applied)
+        """
+        self._apply_transformation()
+        # the lines can be changed from outside
+        self._buffer = None
+        return self._layers
+
+    @layers.setter
+    def layers(self, layers):
+        self._layers = layers
+        self._matrix = np.identity(3)
+        self._buffer = None
+
+    def _get_buffer(self):
+        """
+        All lines and their points as one array
+        :return: (lines, points, offsets)
+        """
+        if self._buffer is None:
+            lines = [line for layer in self._layers.values() for line in layer]
+            arrays = [np.asarray(line.data, dtype=float).reshape(-1, 2) for line in lines]
+            points = np.concatenate(arrays) if arrays else np.zeros((0, 2))
+            offsets = np.cumsum([len(array) for array in arrays])[:-1]
+            self._buffer = lines, points, offsets
+        return self._buffer
+
+    def _get_points(self):
+        """
+        All points with the pending transformation
+        """
+        _, points, _ = self._get_buffer()
+        return points.dot(self._matrix[:2, :2].T) + self._matrix[:2, 2]
+
+    def _transform(self, matrix):
+        """
+        Add an affine transformation (3x3 matrix) to the pending transformation
+        """
+        self._matrix = np.asarray(matrix).dot(self._matrix)
+
+    def _apply_transformation(self):
+        if np.array_equal(self._matrix, np.identity(3)):
+            return
+        lines, _, offsets = self._get_buffer()
+        points = self._get_points()
+        for line, data in zip(lines, np.split(points, offsets)):
+            line.data = data
+        self._buffer = lines, points, offsets
+        self._matrix = np.identity(3)
+
+    def set_dtype(self, dtype):
+        for layer in self.layers.values():
             for line in layer:
-                if line:
-                    values = [p[axis] for p in line]
-                    start = min(start, min(values))
-        return start
+                line.set_dtype(dtype)
+        return self
+
+    def _get_limit(self, function, axis, empty):
+        points = self._get_points()
+        if not len(points):
+            return empty
+        return function(points[:, axis])
 
     @property
     def max_x(self):
-        return max(self.max_function(0, l) for l in self.layers.values())
+        return self._get_limit(np.max, 0, float("-Inf"))
 
     @property
     def max_y(self):
-        return max(self.max_function(1, l) for l in self.layers.values())
+        return self._get_limit(np.max, 1, float("-Inf"))
 
     @property
     def min_x(self):
-        return min(self.min_function(0, l) for l in self.layers.values())
+        return self._get_limit(np.min, 0, float("Inf"))
 
     @property
     def min_y(self):
-        return min(self.min_function(1, l) for l in self.layers.values())
+        return self._get_limit(np.min, 1, float("Inf"))
 
     @property
     def width(self):
@@ -185,14 +239,16 @@ class PlotPart(object):
                 [self.max_x, self.max_y], [self.min_x, self.max_y]]
 
     def rotate(self, angle, radians=True):
-        for layer in self.layers.values():
-            for polyline in layer:
-                polyline.rotate(angle, radians=radians)
+        if not radians:
+            angle = np.pi*angle/180
+        matrix = np.identity(3)
+        matrix[:2, :2] = rotation_2d(angle)
+        self._transform(matrix)
 
     def move(self, vector):
-        for layer_name, layer in self.layers.items():
-            for vectorlist in layer:
-                vectorlist.move(vector)
+        matrix = np.identity(3)
+        matrix[:2, 2] = vector
+        self._transform(matrix)
 
     def move_to(self, vector):
         minx = self.min_x
@@ -238,9 +294,7 @@ class PlotPart(object):
         return self
 
     def scale(self, factor):
-        for layer in self.layers.values():
-            for p in layer:
-                p.scale(factor)
+        self._transform(np.diag([factor, factor, 1.]))
 
     def get_svg_group(self, non_scaling_stroke=True):
         import svgwrite
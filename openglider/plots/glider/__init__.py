@@ -1,9 +1,11 @@
 import collections
 
+import openglider
 from openglider.plots.drawing import Layout
 from openglider.plots.glider.cell import CellPlotMaker
 from openglider.plots.glider.ribs import RibPlot
 from openglider.plots.glider.config import PatternConfig, OtherPatternConfig
+from openglider.vector.projection import flatten_lists
 
 
 class PlotMaker(object):
@@ -47,8 +49,23 @@ class PlotMaker(object):
 
         return self._cellplotmakers[cell]
 
+    def flatten_cells(self):
+        """
+        Flatten the ribs of all cells at once
+        """
+        plotmakers = [self._get_cellplotmaker(cell) for cell in self.glider_3d.cells]
+        plotmakers = [pm for pm in plotmakers if pm._flattened_cell is None]
+        if not plotmakers:
+            return
+
+        flattened = flatten_lists([pm.cell.prof1 for pm in plotmakers],
+                                  [pm.cell.prof2 for pm in plotmakers])
+        for pm, lists in zip(plotmakers, flattened):
+            pm._flattened_lists = lists
+
     def get_panels(self):
         self.panels.clear()
+        self.flatten_cells()
         panels_upper = []
         panels_lower = []
         panels = []
@@ -168,8 +185,20 @@ class PlotMaker(object):
         self.get_ribs()
         self.get_dribs()
         self.get_straps()
+        self.set_dtype(openglider.config["bulk_dtype"])
         return self
 
+    def set_dtype(self, dtype):
+        """
+        Store the outlines of all parts as dtype (p.e. float32 to save memory)
+        """
+        self.panels.set_dtype(dtype)
+        for part in self.ribs:
+            part.set_dtype(dtype)
+        for parts in list(self.dribs.values()) + list(self.straps.values()):
+            for part in parts:
+                part.set_dtype(dtype)
+
     def get_all_parts(self):
         parts = []
         for cell in self.panels.values():
@@ -1,8 +1,11 @@
 import math
 
+import numpy as np
+
 from openglider.airfoil import get_x_value
 from openglider.plots import cuts, PlotPart
 from openglider.plots.glider.config import PatternConfig
+from openglider.utils.persistent_cache import persistent
 from openglider.vector import PolyLine2D, vector_angle
 from openglider.vector.text import Text
 import openglider.vector.projection as projection
@@ -323,8 +326,8 @@ class DribPlot(object):
             left_out = left.copy()
             right_out = right.copy()
 
-            left_out.add_stuff(-self.config.allowance_general)
-            right_out.add_stuff(self.config.allowance_general)
+            PolyLine2D.add_stuff_multiple([left_out, right_out],
+                                          [-self.config.allowance_general, self.config.allowance_general])
             self._left_out = left_out
             self._right_out = right_out
 
@@ -488,38 +491,46 @@ class CellPlotMaker:
         self.config = self.DefaultConf(config)
 
         self._flattened_cell = None
+        self._flattened_lists = None  # (left, right), set by PlotMaker.flatten_cells
 
     def _get_flatten_cell(self):
         if self._flattened_cell is None:
-            # assert isinstance(cell, Cell)
-            left, right = projection.flatten_list(self.cell.prof1,
-                                                  self.cell.prof2)
-            left_bal = left.copy()
-            right_bal = right.copy()
-            ballooning = [self.cell.ballooning[x] for x in self.cell.rib1.profile_2d.x_values]
-            for i in range(len(left)):
-                diff = (right[i] - left[i]) * ballooning[i] / 2
-                left_bal.data[i] -= diff
-                right_bal.data[i] += diff
-
-            inner = [left, right]
-            ballooned = [left_bal, right_bal]
-
-            outer_left = left_bal.copy().add_stuff(-self.config.allowance_general)
-            outer_right = right_bal.copy().add_stuff(self.config.allowance_general)
-
-            outer_orig = [outer_left, outer_right]
-            outer = [l.copy().check() for l in outer_orig]
-
-            self._flattened_cell = [
-                inner,
-                ballooned,
-                outer,
-                outer_orig
-            ]
+            self._flattened_cell = self._flatten_cell()
 
         return self._flattened_cell
 
+    @persistent('cell.prof1', 'cell.prof2', 'cell.ballooning', 'cell.rib1.profile_2d', 'config.allowance_general')
+    def _flatten_cell(self):
+        # assert isinstance(cell, Cell)
+        if self._flattened_lists is not None:
+            left, right = self._flattened_lists
+        else:
+            left, right = projection.flatten_list(self.cell.prof1,
+                                                  self.cell.prof2)
+        left_bal = left.copy()
+        right_bal = right.copy()
+        ballooning = self.cell.ballooning.mapx(self.cell.rib1.profile_2d.x_values)
+        diff = (right.data - left.data) * ballooning[:, np.newaxis] / 2
+        left_bal.data = left_bal.data - diff
+        right_bal.data = right_bal.data + diff
+
+        inner = [left, right]
+        ballooned = [left_bal, right_bal]
+
+        outer_left, outer_right = PolyLine2D.add_stuff_multiple(
+            [left_bal.copy(), right_bal.copy()],
+            [-self.config.allowance_general, self.config.allowance_general])
+
+        outer_orig = [outer_left, outer_right]
+        outer = [l.copy().check() for l in outer_orig]
+
+        return [
+            inner,
+            ballooned,
+            outer,
+            outer_orig
+        ]
+
     def get_panels(self, panels=None):
         cell_panels = []
         flattened_cell = self._get_flatten_cell()
@@ -1,35 +1,163 @@
+import collections
+import contextlib
 import copy
+import functools
+import itertools
+import json
+import threading
 import time
+import weakref
+import zlib
 
 import numpy as np
 
 import openglider
 
-cache_instances = []
+# global source of cache-versions, every change of a CachedObject draws a new (unique) number
+_versions = itertools.count(1)
+_immutable_types = (int, float, complex, str, bytes, bool, type(None))
+# objects invalidated within a defer_invalidation-block (per thread)
+_deferred = threading.local()
 
 
 class CachedObject(object):
     """
     An object to provide cached properties and functions.
     Provide a list of attributes to hash down for tracking changes
+
+    Every (public) attribute-assignment bumps the objects cache_version,
+    which is pushed forward to all CachedObjects referencing this one as an attribute.
+    In-place changes of attributes (p.e. numpy-arrays) have to be followed by invalidate()
+    unless the attribute is listed in a hashlist.
     """
     hashlist = ()
-    cached_properties = []
 
     def __hash__(self):
         return hash_attributes(self, self.hashlist)
 
-    def __del__(self):
-        for prop in self.cached_properties:
-            if id(self) in prop.cache:
-                prop.cache.pop(id(self))
-
     def __repr__(self):
         rep = super(CachedObject, self).__repr__()
         if hasattr(self, "name"):
             rep = rep[:-1] + ': "{}">'.format(self.name)
         return rep
 
+    def __setattr__(self, key, value):
+        if key.startswith("_"):
+            object.__setattr__(self, key, value)
+            return
+
+        dct = self.__dict__
+        old = dct.get(key, None)
+        if old is not None and type(old) is type(value) and isinstance(value, _immutable_types) and old == value:
+            # nothing changed
+            object.__setattr__(self, key, value)
+            return
+
+        object.__setattr__(self, key, value)
+
+        if isinstance(old, CachedObject) and old is not value:
+            if not any(other is old for other in dct.values()):
+                old._remove_dependent(self)
+        if isinstance(value, CachedObject) and value is not self:
+            value._add_dependent(self)
+
+        self.invalidate()
+
+    def __getstate__(self):
+        # caches, versions and dependencies are bound to the instance
+        return {key: value for key, value in self.__dict__.items()
+                if key not in ("_cache", "_version", "_dependents", "_invalidating")}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        for key, value in state.items():
+            if isinstance(value, CachedObject) and not key.startswith("_") and value is not self:
+                value._add_dependent(self)
+
+    @property
+    def cache_version(self):
+        """
+        A unique number for the current state of the object
+        """
+        try:
+            return self.__dict__["_version"]
+        except KeyError:
+            self._version = version = next(_versions)
+            return version
+
+    def invalidate(self):
+        """
+        Mark the object as changed and push the change forward to all dependent objects
+        """
+        if self.__dict__.get("_invalidating", False):
+            return  # circular reference
+        self._version = next(_versions)
+
+        deferred = getattr(_deferred, "objects", None)
+        if deferred is not None:
+            deferred[id(self)] = self
+            return
+
+        dependents = self.__dict__.get("_dependents")
+        if dependents:
+            self._invalidating = True
+            try:
+                for key, ref in list(dependents.items()):
+                    dependent = ref()
+                    if dependent is None:
+                        dependents.pop(key)
+                    else:
+                        dependent.invalidate()
+            finally:
+                self._invalidating = False
+
+    def _add_dependent(self, other):
+        if "_dependents" not in self.__dict__:
+            self._dependents = {}
+        self._dependents[id(other)] = weakref.ref(other)
+
+    def _remove_dependent(self, other):
+        self.__dict__.get("_dependents", {}).pop(id(other), None)
+
+
+@contextlib.contextmanager
+def defer_invalidation():
+    """
+    Collect the invalidations within a with-block and push them forward to the
+    dependent objects at the end, every dependent is invalidated only once.
+    The changed objects themselves get a new cache_version immediately.
+    """
+    if getattr(_deferred, "objects", None) is not None:  # nested block
+        yield
+        return
+
+    _deferred.objects = objects = {}
+    try:
+        yield
+    finally:
+        _deferred.objects = None
+        invalidate_dependents(objects.values())
+
+
+def invalidate_dependents(objects):
+    """
+    Invalidate all objects depending on (one of) the given objects
+    """
+    todo = list(objects)
+    done = {id(obj) for obj in todo}
+    while todo:
+        dependents = todo.pop().__dict__.get("_dependents")
+        if not dependents:
+            continue
+        for key, ref in list(dependents.items()):
+            dependent = ref()
+            if dependent is None:
+                dependents.pop(key)
+            elif id(dependent) not in done:
+                done.add(id(dependent))
+                dependent._version = next(_versions)
+                todo.append(dependent)
+
 
 def cached_property(*hashlist):
     #@functools.wraps
@@ -39,38 +167,449 @@ def cached_property(*hashlist):
             self.function = fget
             self.__doc__ = doc or fget.__doc__
             self.__module__ = fget.__module__
+            self.name = getattr(fget, "__qualname__", fget.__name__)
 
             self.hashlist = hashlist
-            self.cache = {}
-
-            global cache_instances
-            cache_instances.append(self)
 
         def __get__(self, parentclass, type=None):
             if not openglider.config["caching"]:
                 return self.function(parentclass)
+            elif cache_profile is not None:
+                return cache_profile.get(self, parentclass)
             else:
-                if not hasattr(parentclass, "_cache"):
-                    parentclass._cache = {}
-
-                cache = parentclass._cache
-                dahash = hash_attributes(parentclass, self.hashlist)
-                # Return cached or recalc if hashes differ
-                if self not in cache or cache[self]['hash'] != dahash:
-                    res = self.function(parentclass)
-                    cache[self] = {
-                        "hash": dahash,
-                        "value": res
-                    }
+                version = tuple(dependency_version(parentclass, attribute) for attribute in self.hashlist)
+                # Return cached or recalc if any dependency changed
+                found, res = cache_store.get(parentclass, self, version)
+                if not found:
+                    res = cache_store.compute(parentclass, self, version)
 
-                return cache[self]["value"]
+                return res
 
     return CachedProperty
 
 
-def clear_cache():
-    for instance in cache_instances:
-        instance.cache.clear()
+class CachedCall(object):
+    """
+    Key of a cached method-call (method and arguments) within the CacheStore,
+    the arguments are only kept until the value is computed.
+    """
+    def __init__(self, method, key, args):
+        self.method = method
+        self.name = method.__qualname__
+        self.key = key
+        self.args = args
+
+    def __hash__(self):
+        return hash((self.name, self.key))
+
+    def __eq__(self, other):
+        return isinstance(other, CachedCall) and self.name == other.name and self.key == other.key
+
+    def function(self, instance):
+        return self.method(instance, *self.args)
+
+
+def cached_method(*hashlist, key=None, max_calls=64):
+    """
+    Cache the results of a method per set of arguments (as cached_property does per instance).
+    Every result is an own entry in the cache_store: counted at its size and evicted with the others.
+    Results of an older version of the instance are dropped, and at most max_calls results
+    are kept per instance.
+    :param key: function(*args) -> hashable key of the arguments (default: the arguments themselves)
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(instance, *args):
+            if not openglider.config["caching"]:
+                return method(instance, *args)
+
+            call = CachedCall(method, args if key is None else key(*args), args)
+            version = tuple(dependency_version(instance, attribute) for attribute in hashlist)
+            found, value = cache_store.get(instance, call, version)
+            if not found:
+                value = cache_store.compute(instance, call, version)
+                cache_store.trim_calls(instance, call, max_calls)
+            call.args = None
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+class CacheStore(object):
+    """
+    Bookkeeping of all cached values: memory-budget, eviction and statistics.
+
+    The values are stored within the instances (instance._cache), the store
+    only keeps track of their size and usage. If no max_bytes/eviction is given,
+    the values from openglider.config are used (cache_max_bytes, cache_eviction).
+
+    eviction:
+        * "lru": remove the least recently used values first
+        * "cost": remove the values with the lowest computation-time per byte first
+
+    The bookkeeping is thread-safe. Within a threadsafe()-block (or with
+    openglider.config.cache_threadsafe set), every value is computed only once,
+    even if it is requested from several threads.
+    """
+    def __init__(self, max_bytes=None, eviction=None):
+        self.max_bytes = max_bytes
+        self.eviction = eviction
+        self.entries = collections.OrderedDict()  # (id(instance), property) -> [nbytes, cost]
+        self.instances = {}  # id(instance) -> [weakref, set(properties)]
+        self.nbytes = 0
+        self.statistics = {}
+        self.lock = threading.RLock()
+        self.key_locks = {}  # (id(instance), property) -> [lock, number of threads using it]
+        self._threadsafe_count = 0
+
+    @property
+    def limit(self):
+        if self.max_bytes is not None:
+            return self.max_bytes
+        return openglider.config["cache_max_bytes"]
+
+    @property
+    def policy(self):
+        return self.eviction or openglider.config["cache_eviction"]
+
+    def _get_statistics(self, prop):
+        if prop.name not in self.statistics:
+            self.statistics[prop.name] = {"hits": 0, "misses": 0, "evictions": 0}
+        return self.statistics[prop.name]
+
+    def get(self, instance, prop, version, count=True):
+        """
+        Return (True, value) for a valid cached value or (False, None)
+        """
+        with self.lock:
+            stats = self._get_statistics(prop)
+            cache = instance.__dict__.get("_cache")
+            if cache is not None and prop in cache:
+                entry = cache[prop]
+                if entry["version"] == version:
+                    if count:
+                        stats["hits"] += 1
+                    key = (id(instance), prop)
+                    if key in self.entries:
+                        self.entries.move_to_end(key)
+                    return True, entry["value"]
+
+            if count:
+                stats["misses"] += 1
+            return False, None
+
+    def get_stale(self, instance, prop):
+        """
+        Return (True, value) for any cached value, regardless of its version
+        """
+        cache = instance.__dict__.get("_cache")
+        if cache is not None and prop in cache:
+            return True, cache[prop]["value"]
+        return False, None
+
+    @contextlib.contextmanager
+    def threadsafe(self):
+        """
+        Compute every value only once within the with-block, even if it is
+        requested from several threads (blocks can overlap and nest)
+        """
+        with self.lock:
+            self._threadsafe_count += 1
+        try:
+            yield self
+        finally:
+            with self.lock:
+                self._threadsafe_count -= 1
+
+    def compute(self, instance, prop, version):
+        """
+        Compute and store a value
+        """
+        if not (self._threadsafe_count or openglider.config["cache_threadsafe"]):
+            return self._compute(instance, prop, version)
+
+        key = (id(instance), prop)
+        with self.lock:
+            key_lock = self.key_locks.setdefault(key, [threading.RLock(), 0])
+            key_lock[1] += 1
+        try:
+            with key_lock[0]:
+                # maybe another thread was faster
+                found, value = self.get(instance, prop, version, count=False)
+                if not found:
+                    value = self._compute(instance, prop, version)
+                return value
+        finally:
+            # the lock is only kept while threads are waiting for the value
+            with self.lock:
+                key_lock[1] -= 1
+                if not key_lock[1]:
+                    self.key_locks.pop(key, None)
+
+    def _compute(self, instance, prop, version):
+        start = time.time()
+        value = prop.function(instance)
+        self.set(instance, prop, version, value, cost=time.time() - start)
+        return value
+
+    def set(self, instance, prop, version, value, cost=0.):
+        nbytes = get_size(value)
+        with self.lock:
+            if "_cache" not in instance.__dict__:
+                instance._cache = {}
+            instance._cache[prop] = {
+                "version": version,
+                "value": value
+            }
+
+            instance_id = id(instance)
+            if instance_id not in self.instances:
+                ref = weakref.ref(instance, lambda _, key=instance_id: self._forget(key))
+                self.instances[instance_id] = [ref, set()]
+            self.instances[instance_id][1].add(prop)
+
+            key = (instance_id, prop)
+            if key in self.entries:
+                self.nbytes -= self.entries[key][0]
+            self.entries[key] = [nbytes, cost]
+            self.entries.move_to_end(key)
+            self.nbytes += nbytes
+
+            self.evict()
+
+    def trim_calls(self, instance, call, max_calls):
+        """
+        Remove the cached results of a method (CachedCall) from other versions of
+        the instance and the oldest ones above max_calls
+        """
+        with self.lock:
+            cache = instance.__dict__.get("_cache", {})
+            if call not in cache:
+                return
+            version = cache[call]["version"]
+            calls = [prop for prop in cache if isinstance(prop, CachedCall) and prop.name == call.name]
+            current = [prop for prop in calls if cache[prop]["version"] == version]
+            remove = [prop for prop in calls if cache[prop]["version"] != version]
+            remove += current[:max(len(current) - max_calls, 0)]
+            for prop in remove:
+                self._remove((id(instance), prop))
+
+    def evict(self, max_bytes=None):
+        """
+        Remove cached values until the store fits into max_bytes (default: self.limit)
+        """
+        if max_bytes is None:
+            max_bytes = self.limit
+        if max_bytes is None or self.nbytes <= max_bytes:
+            return
+
+        with self.lock:
+            if self.policy == "cost":
+                candidates = sorted(self.entries, key=lambda key: self.entries[key][1] / max(self.entries[key][0], 1))
+            elif self.policy == "lru":
+                candidates = list(self.entries)
+            else:
+                raise ValueError("Unknown eviction policy: {}".format(self.policy))
+
+            for key in candidates:
+                if self.nbytes <= max_bytes:
+                    break
+                if self._remove(key):
+                    self._get_statistics(key[1])["evictions"] += 1
+
+    def clear(self, scope=None):
+        """
+        Remove cached values. scope can be:
+            * None: everything
+            * a property name (p.e. "profile_3d" or "Rib.profile_3d")
+            * a class: all instances of this class
+            * an instance
+        """
+        with self.lock:
+            if scope is None:
+                keys = list(self.entries)
+            elif isinstance(scope, str):
+                keys = [key for key in self.entries
+                        if key[1].name == scope or key[1].name.split(".")[-1] == scope]
+            elif isinstance(scope, type):
+                keys = [key for key in self.entries
+                        if isinstance(self.instances[key[0]][0](), scope)]
+            else:
+                keys = [key for key in self.entries if key[0] == id(scope)]
+
+            for key in keys:
+                self._remove(key)
+
+    def _remove(self, key):
+        instance_id, prop = key
+        if key not in self.entries:  # instance already gone
+            return False
+        nbytes, _ = self.entries.pop(key)
+        self.nbytes -= nbytes
+
+        ref, props = self.instances[instance_id]
+        props.discard(prop)
+        instance = ref()
+        if instance is not None:
+            instance.__dict__.get("_cache", {}).pop(prop, None)
+        if not props:
+            self.instances.pop(instance_id)
+        return True
+
+    def _forget(self, instance_id):
+        with self.lock:
+            ref, props = self.instances.pop(instance_id, (None, ()))
+            for prop in props:
+                nbytes, _ = self.entries.pop((instance_id, prop))
+                self.nbytes -= nbytes
+
+
+cache_store = CacheStore()
+
+
+def set_cache_store(store):
+    """
+    Replace the global CacheStore
+    """
+    global cache_store
+    cache_store.clear()
+    cache_store = store
+
+
+def clear_cache(scope=None):
+    cache_store.clear(scope)
+
+
+class CacheProfile(object):
+    """
+    Instrumentation of cached properties: records the time spent on dependency-versions
+    ("hash time") and on computation, hits, misses and recomputations that returned the
+    same value as before ("unchanged").
+
+    >>> with profile_cache() as profile:
+    ...     glider = glider_2d.get_glider_3d()
+    >>> print(profile.report())
+    """
+    columns = ("hits", "misses", "unchanged", "hash_time", "compute_time")
+
+    def __init__(self):
+        self.records = {}
+
+    def _get_record(self, prop):
+        if prop.name not in self.records:
+            self.records[prop.name] = {column: 0 for column in self.columns}
+        return self.records[prop.name]
+
+    def get(self, prop, instance):
+        record = self._get_record(prop)
+
+        start = time.time()
+        version = tuple(dependency_version(instance, attribute) for attribute in prop.hashlist)
+        record["hash_time"] += time.time() - start
+
+        found, value = cache_store.get(instance, prop, version)
+        if found:
+            record["hits"] += 1
+            return value
+
+        record["misses"] += 1
+        stale, old_value = cache_store.get_stale(instance, prop)
+
+        start = time.time()
+        value = cache_store.compute(instance, prop, version)
+        record["compute_time"] += time.time() - start
+
+        if stale and values_equal(old_value, value):
+            record["unchanged"] += 1
+
+        return value
+
+    def get_rows(self, sort="total_time"):
+        rows = []
+        for name, record in self.records.items():
+            row = dict(record)
+            row["name"] = name
+            row["total_time"] = record["hash_time"] + record["compute_time"]
+            calls = record["hits"] + record["misses"]
+            row["hit_rate"] = record["hits"] / calls if calls else 0.
+            rows.append(row)
+
+        rows.sort(key=lambda row: row[sort], reverse=(sort != "name"))
+        return rows
+
+    def report(self, sort="total_time"):
+        """
+        Return a text-table sorted by the given column
+        """
+        header = "{:<40} {:>8} {:>8} {:>9} {:>9} {:>11} {:>13}".format(
+            "property", "hits", "misses", "hit rate", "unchanged", "hash time", "compute time")
+        lines = [header, "-" * len(header)]
+        for row in self.get_rows(sort):
+            lines.append("{name:<40} {hits:>8} {misses:>8} {hit_rate:>9.1%} {unchanged:>9} "
+                         "{hash_time:>10.4f}s {compute_time:>12.4f}s".format(**row))
+        return "\n".join(lines)
+
+    def report_json(self, sort="total_time"):
+        return json.dumps(self.get_rows(sort), indent=2)
+
+
+cache_profile = None
+
+
+@contextlib.contextmanager
+def profile_cache():
+    """
+    Enable the CacheProfile instrumentation within a with-block
+    """
+    global cache_profile
+    old_profile = cache_profile
+    cache_profile = CacheProfile()
+    try:
+        yield cache_profile
+    finally:
+        cache_profile = old_profile
+
+
+def values_equal(value1, value2):
+    """
+    Check if two cached values are equal (used for instrumentation)
+    """
+    if value1 is value2:
+        return True
+    if isinstance(value1, HashedList) and isinstance(value2, HashedList):
+        return values_equal(value1.data, value2.data)
+    if isinstance(value1, np.ndarray) or isinstance(value2, np.ndarray):
+        try:
+            return np.array_equal(value1, value2)
+        except (TypeError, ValueError):
+            return False
+    if isinstance(value1, (list, tuple)) and isinstance(value2, (list, tuple)):
+        return len(value1) == len(value2) and all(values_equal(a, b) for a, b in zip(value1, value2))
+    if isinstance(value1, CachedObject) or isinstance(value2, CachedObject):
+        return False
+    try:
+        return bool(value1 == value2)
+    except (TypeError, ValueError):
+        return False
+
+
+def get_size(value):
+    """
+    Estimate the memory usage (bytes) of a cached value
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    elif isinstance(value, HashedList):
+        return get_size(value.data)
+    elif isinstance(value, (list, tuple)):
+        return sum(get_size(element) for element in value)
+    elif isinstance(value, dict):
+        return sum(get_size(element) for element in value.values())
+    elif isinstance(value, (int, float)):
+        return 8
+    return 0
 
 
 def recursive_getattr(obj, attr):
@@ -86,6 +625,53 @@ def recursive_getattr(obj, attr):
         return recursive_getattr(getattr(obj, l[0]), '.'.join(l[1:]))
 
 
+def dependency_version(class_instance, attribute):
+    """
+    Get a comparable value representing the state of an attribute (chain):
+        * CachedObjects -> cache_version
+        * immutable values -> the value itself
+        * anything else -> hash
+    """
+    if attribute == "self":
+        if isinstance(class_instance, CachedObject):
+            return (class_instance.cache_version, ) + \
+                tuple(dependency_version(class_instance, attr) for attr in class_instance.hashlist)
+        return hash_value(class_instance)
+
+    value = recursive_getattr(class_instance, attribute)
+    if isinstance(value, CachedObject):
+        return value.cache_version
+    elif isinstance(value, _immutable_types):
+        return value
+    return hash_value(value)
+
+
+def hash_value(value):
+    if isinstance(value, np.ndarray):
+        return hash(value.tobytes())
+    try:
+        return hash(value)
+    except TypeError:  # Lists p.e.
+        try:
+            return hash(frozenset(value))
+        except TypeError:
+            return hash(str(value))
+
+
+def fingerprint(array):
+    """
+    Fast (non-cryptographic) content-hash of an array, based on its raw bytes
+    """
+    array = np.ascontiguousarray(array)
+    try:
+        buffer = memoryview(array).cast("B")
+    except (TypeError, ValueError):  # object-arrays
+        buffer = str(array.tolist()).encode()
+    digest = zlib.crc32(buffer) << 32 | zlib.adler32(buffer)
+    # no hash() here: the fingerprint has to be the same for every process
+    return digest ^ zlib.crc32("{}{}".format(array.shape, array.dtype.str).encode())
+
+
 def c_mul(a, b):
     """
     C type multiplication
@@ -130,9 +716,11 @@ class HashedList(CachedObject):
     Hashed List to use cached properties
     """
     name = "unnamed"
+    dtype = None  # dtype of the data (None: take it from the input, float64 for most geometry)
+
     def __init__(self, data, name=None):
         self._data = None
-        self._hash = None
+        self._fingerprint = None
         self.data = data
         self.name = name or getattr(self, 'name', None)
 
@@ -146,13 +734,10 @@ class HashedList(CachedObject):
 
     def __setitem__(self, key, value):
         self.data[key] = np.array(value)
-        self._hash = None
+        self.invalidate()
 
     def __hash__(self):
-        if self._hash is None:
-            self._hash = hash(str(self.data))
-            #self._hash = hash("{}/{}".format(id(self), time.time()))
-        return self._hash
+        return self.fingerprint
 
     def __len__(self):
         return len(self.data)
@@ -167,6 +752,22 @@ class HashedList(CachedObject):
     def __repr__(self):
         return "<class '{}' name: {}".format(self.__class__, self.name)
 
+    @property
+    def fingerprint(self):
+        """
+        Content-digest of the data, cached until the next write
+        """
+        if self._fingerprint is None:
+            self._fingerprint = fingerprint(self._data)
+        return self._fingerprint
+
+    def invalidate(self):
+        """
+        Reset the fingerprint, needs to be called after in-place changes of the data
+        """
+        self._fingerprint = None
+        super(HashedList, self).invalidate()
+
     @property
     def data(self):
         return self._data
@@ -175,12 +776,22 @@ class HashedList(CachedObject):
     def data(self, data):
         if data is not None:
             data = list(data)  # np.array(zip(x,y)) is shit
-            self._data = np.array(data)
+            self._data = np.array(data, dtype=self.dtype)
             #self._data = np.array(data)
             #self._data = [np.array(vector) for vector in data]  # 1,5*execution time
-            self._hash = None
         else:
             self._data = []
+        self.invalidate()
+
+    def set_dtype(self, dtype):
+        """
+        Store the data (and all future data) as dtype, p.e. float32 for bulk data.
+        None leaves the data as it is.
+        """
+        if dtype is not None:
+            self.dtype = np.dtype(dtype)
+            self.data = self._data
+        return self
 
     def copy(self):
         return copy.deepcopy(self)
\ No newline at end of file
@@ -0,0 +1,287 @@
+"""
+Persistent (on-disk) cache for derived geometry.
+
+Results are stored as .npz-files in a directory, keyed by the fingerprints of
+their inputs and the openglider version. The cache is disabled unless
+openglider.config.persistent_cache is set to a directory:
+
+    openglider.config.persistent_cache = "/tmp/openglider_cache"
+    openglider.config.persistent_cache_max_bytes = 2**30
+
+Purge from the command line:
+
+    python -m openglider.utils.persistent_cache purge [path] [--max-bytes N]
+"""
+import functools
+import hashlib
+import importlib
+import json
+import os
+import sys
+import tempfile
+import zipfile
+
+import numpy as np
+
+import openglider
+from openglider.utils.cache import HashedList, fingerprint, recursive_getattr
+
+
+class DiskCache(object):
+    """
+    A directory of .npz-files with a size limit (least recently used files are purged first)
+    """
+    suffix = ".npz"
+
+    def __init__(self, path, max_bytes=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._nbytes = None
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def _filename(self, key):
+        return os.path.join(self.path, key + self.suffix)
+
+    def _files(self):
+        for entry in os.scandir(self.path):
+            if entry.is_file() and entry.name.endswith(self.suffix):
+                yield entry
+
+    @property
+    def nbytes(self):
+        if self._nbytes is None:
+            self._nbytes = sum(entry.stat().st_size for entry in self._files())
+        return self._nbytes
+
+    def __len__(self):
+        return len(list(self._files()))
+
+    def load(self, key):
+        """
+        Return the stored value or None
+        """
+        filename = self._filename(key)
+        try:
+            with np.load(filename, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+            structure = json.loads(str(arrays.pop("__structure__")))
+            value = unpack(structure, arrays)
+        except (IOError, OSError):
+            return None
+        except (ValueError, KeyError, TypeError, EOFError, zipfile.BadZipFile, json.JSONDecodeError):
+            # damaged file (p.e. truncated): a miss, remove it
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
+            self._nbytes = None
+            return None
+
+        try:
+            os.utime(filename)  # mark as recently used
+        except OSError:
+            pass
+        return value
+
+    def save(self, key, value):
+        """
+        Store a value (arrays, HashedLists and (nested) lists of them).
+        Returns False if the value can not be stored.
+        """
+        arrays = {}
+        try:
+            structure = pack(value, arrays, "a")
+        except TypeError:
+            return False
+        arrays["__structure__"] = np.array(json.dumps(structure))
+
+        filename = self._filename(key)
+        handle, temp_name = tempfile.mkstemp(suffix=self.suffix, dir=self.path)
+        try:
+            with os.fdopen(handle, "wb") as outfile:
+                np.savez(outfile, **arrays)
+            old_size = os.path.getsize(filename) if os.path.exists(filename) else 0
+            os.replace(temp_name, filename)
+        except Exception:
+            # don't leave half-written files behind (p.e. disk full)
+            try:
+                os.unlink(temp_name)
+            except OSError:
+                pass
+            raise
+
+        if self._nbytes is not None:
+            self._nbytes += os.path.getsize(filename) - old_size
+
+        max_bytes = self.max_bytes
+        if max_bytes is not None and self.nbytes > max_bytes:
+            self.purge(max_bytes * 0.9)
+        return True
+
+    def purge(self, max_bytes=0):
+        """
+        Remove the least recently used files until the cache is smaller than max_bytes.
+        Returns the number of removed files
+        """
+        files = sorted(self._files(), key=lambda entry: entry.stat().st_mtime)
+        nbytes = sum(entry.stat().st_size for entry in files)
+        removed = 0
+        for entry in files:
+            if nbytes <= max_bytes:
+                break
+            size = entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+            nbytes -= size
+            removed += 1
+
+        self._nbytes = None
+        return removed
+
+
+def pack(value, arrays, prefix):
+    """
+    Convert a value to a json-structure and a dict of arrays
+    """
+    if isinstance(value, HashedList):
+        arrays[prefix] = np.asarray(value.data)
+        return {"type": "hashedlist",
+                "class": "{}.{}".format(value.__class__.__module__, value.__class__.__name__),
+                "name": value.name if isinstance(value.name, str) else None,
+                "key": prefix}
+    elif isinstance(value, np.ndarray):
+        if value.dtype == object:
+            raise TypeError("Can not store object-arrays")
+        arrays[prefix] = value
+        return {"type": "array", "key": prefix}
+    elif isinstance(value, (list, tuple)):
+        return {"type": "list",
+                "items": [pack(item, arrays, "{}_{}".format(prefix, i)) for i, item in enumerate(value)]}
+    elif isinstance(value, (int, float, str, bool, type(None))):
+        return {"type": "value", "value": value}
+
+    raise TypeError("Can not store {}".format(value.__class__))
+
+
+def unpack(structure, arrays):
+    value_type = structure["type"]
+    if value_type == "hashedlist":
+        module_name, class_name = structure["class"].rsplit(".", 1)
+        if not module_name.startswith("openglider."):
+            raise ValueError("Not allowed to import {}".format(module_name))
+        cls = getattr(importlib.import_module(module_name), class_name)
+        return cls(arrays[structure["key"]], name=structure["name"])
+    elif value_type == "array":
+        return arrays[structure["key"]]
+    elif value_type == "list":
+        return [unpack(item, arrays) for item in structure["items"]]
+    return structure["value"]
+
+
+def update_digest(digest, value):
+    """
+    Update a hashlib-digest with the content of a value
+    """
+    if isinstance(value, HashedList):
+        digest.update(b"H" + str(value.fingerprint).encode())
+    elif isinstance(value, np.ndarray):
+        digest.update(b"A" + str(fingerprint(value)).encode())
+    elif isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, (int, float)) for item in value):
+            digest.update(b"A" + str(fingerprint(np.array(value, dtype=float))).encode())
+        else:
+            digest.update(b"[")
+            for item in value:
+                update_digest(digest, item)
+            digest.update(b"]")
+    elif isinstance(value, dict):
+        digest.update(b"{")
+        for key in sorted(value):
+            digest.update(str(key).encode())
+            update_digest(digest, value[key])
+        digest.update(b"}")
+    elif isinstance(value, (int, float, complex, str, bool, type(None))):
+        digest.update(repr(value).encode())
+    elif hasattr(value, "__json__"):
+        digest.update(value.__class__.__name__.encode())
+        update_digest(digest, value.__json__())
+    else:
+        raise TypeError("Can not fingerprint {}".format(value.__class__))
+
+
+_disk_caches = {}
+
+
+def get_disk_cache():
+    """
+    Return the DiskCache configured in openglider.config (or None)
+    """
+    path = openglider.config["persistent_cache"]
+    if path is None:
+        return None
+    if path not in _disk_caches:
+        _disk_caches[path] = DiskCache(path)
+    disk_cache = _disk_caches[path]
+    disk_cache.max_bytes = openglider.config["persistent_cache_max_bytes"]
+    return disk_cache
+
+
+def persistent(*inputs):
+    """
+    Decorator to store the results of a method on disk.
+    inputs: attribute-names (as with cached_property) or functions of the instance,
+            the arguments of the call are added to the key as well.
+    """
+    def decorator(function):
+        name = getattr(function, "__qualname__", function.__name__)
+
+        @functools.wraps(function)
+        def wrapper(self, *args, **kwargs):
+            disk_cache = get_disk_cache()
+            if disk_cache is None:
+                return function(self, *args, **kwargs)
+
+            digest = hashlib.sha1()
+            digest.update("{}/{}".format(name, openglider.__version__).encode())
+            try:
+                for attribute in inputs:
+                    if callable(attribute):
+                        update_digest(digest, attribute(self))
+                    else:
+                        update_digest(digest, recursive_getattr(self, attribute))
+                update_digest(digest, list(args))
+                update_digest(digest, kwargs)
+            except TypeError:
+                return function(self, *args, **kwargs)
+            key = digest.hexdigest()
+
+            value = disk_cache.load(key)
+            if value is None:
+                value = function(self, *args, **kwargs)
+                disk_cache.save(key, value)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="openglider persistent cache")
+    parser.add_argument("command", choices=["purge", "info"])
+    parser.add_argument("path", nargs="?", default=openglider.config["persistent_cache"])
+    parser.add_argument("--max-bytes", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.path is None:
+        sys.exit("no cache-directory given")
+
+    cache = DiskCache(args.path)
+    if args.command == "purge":
+        print("removed {} files".format(cache.purge(args.max_bytes)))
+    else:
+        print("{}: {} files, {} bytes".format(args.path, len(cache), cache.nbytes))
@@ -82,6 +82,23 @@ def cut(p1, p2, p3, p4):
     return p1 + k * (p2 - p1), k, l
 
 
+def cut_multiple(p1, p2, p3, p4):
+    """
+    Vectorized version of cut: p1..p4 are arrays of points (broadcast against each other).
+    Returns (points, k, l); parallel lines get nan-values
+    """
+    p1, p2, p3, p4 = [np.asarray(p, dtype=float) for p in (p1, p2, p3, p4)]
+    d1 = p2 - p1
+    d2 = p3 - p4
+    rhs = p3 - p1
+    determinant = d1[..., 0] * d2[..., 1] - d2[..., 0] * d1[..., 1]
+    parallel = determinant == 0
+    determinant = np.where(parallel, np.nan, determinant)
+    k = (rhs[..., 0] * d2[..., 1] - d2[..., 0] * rhs[..., 1]) / determinant
+    l = (d1[..., 0] * rhs[..., 1] - d1[..., 1] * rhs[..., 0]) / determinant
+    return p1 + k[..., np.newaxis] * d1, k, l
+
+
 def set_dimension(array, dim=3):
     array = np.array(array)
     if len(array.shape) == 1:
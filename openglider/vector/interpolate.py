@@ -1,3 +1,6 @@
+import numpy as np
+
+from openglider.utils.cache import cached_property
 from openglider.vector import PolyLine2D
 
 
@@ -6,19 +9,48 @@ class Interpolation(PolyLine2D):
         super(Interpolation, self).__init__(data, name)
         self.extrapolate = extrapolate
 
-    def __call__(self, xval):
-        last_point = self.data[0]
-        for index, point in enumerate(self.data):
-            if index == 0:
-                continue
+    @cached_property('self')
+    def _x_sorted(self):
+        x = self.data[:, 0]
+        return bool(np.all(x[1:] >= x[:-1]))
 
-            lower_bound = self.extrapolate or last_point[0] < xval
-            end_of_list = self.extrapolate and index == len(self.data) - 1
+    def _get_segments(self, xval):
+        """
+        Index of the first point (>=1) with x > xval (the segment ends there),
+        len(data) if there is none. Without extrapolation the start of the
+        segment has to be smaller than xval as well.
+        """
+        x = self.data[:, 0]
+        if self._x_sorted:
+            return np.searchsorted(x, xval, side="right")
 
-            if (lower_bound and xval < point[0]) or end_of_list:
-                d_x = point[0] - last_point[0]
-                return last_point[1] + (xval-last_point[0])/d_x * (point[1] - last_point[1])
+        # unsorted data: first match
+        match = xval[..., np.newaxis] < x[1:]
+        if not self.extrapolate:
+            match &= x[:-1] < xval[..., np.newaxis]
+        return np.where(match.any(axis=-1), match.argmax(axis=-1) + 1, len(x))
+
+    def __call__(self, xval):
+        """
+        Interpolate the y-values for one or many x-values
+        if extrapolate is False, x-values outside of the data (or on the first point) raise an Exception
+        """
+        xval_array = np.asarray(xval, dtype=float)
+        x = self.data[:, 0]
+        y = self.data[:, 1]
 
-            last_point = point
+        index = self._get_segments(xval_array)
+        if self.extrapolate:
+            index = np.clip(index, 1, len(x) - 1)
+        else:
+            valid = (index >= 1) & (index < len(x))
+            index = np.clip(index, 1, len(x) - 1)
+            valid &= x[index - 1] < xval_array
+            if not np.all(valid):
+                raise Exception
 
-        raise Exception
\ No newline at end of file
+        d_x = x[index] - x[index - 1]
+        result = y[index - 1] + (xval_array - x[index - 1]) / d_x * (y[index] - y[index - 1])
+        if np.ndim(xval) == 0:
+            return float(result)
+        return result
@@ -2,7 +2,8 @@ import numpy as np
 
 from openglider.utils import sign
 from openglider.utils.cache import cached_property, HashedList
-from openglider.vector.functions import norm, normalize, rangefrom, rotation_2d, cut
+from openglider.vector.functions import norm, normalize, rangefrom, rotation_2d, cut, cut_multiple
+from openglider.vector.segment_index import SegmentIndex
 from openglider.utils.table import Table
 
 
@@ -15,8 +16,7 @@ class PolyLine(HashedList):
             return self.data[ik]
         elif isinstance(ik, slice):  # example: list[1.2:5.5:1]
             values = self.get_positions(ik.start, ik.stop, ik.step)
-            #print(values, ik.start, ik.stop, ik.step, step, start_round, stop_round)
-            return PolyLine([self[i] for i in values])
+            return PolyLine(self.get_points(values))
         else:
             if ik < 0:
                 k = ik
@@ -28,6 +28,18 @@ class PolyLine(HashedList):
                 k = ik % 1 + max(0, int(ik) - len(self.data) + 2)
             return self.data[i] + k * (self.data[i + 1] - self.data[i])
 
+    def get_points(self, ik_array):
+        """
+        Get the points at many (fractional) indices at once,
+        list.get_points([a, b]) is the same as [list[a], list[b]]
+        (indices outside the list are extrapolated along the first/last segment)
+        :return: array of points (shape: ik_array.shape + (dim,))
+        """
+        ik = np.asarray(ik_array, dtype=float)
+        i = np.clip(np.floor(ik), 0, len(self.data) - 2).astype(int)
+        k = (ik - i)[..., np.newaxis]
+        return self.data[i] + k * (self.data[i + 1] - self.data[i])
+
     def __mul__(self, other):
         """Scale"""
         new = self.copy()
@@ -61,10 +73,7 @@ class PolyLine(HashedList):
         return self[len(self) - 1]
 
     def get(self, start, stop):
-        start2 = start - start % 1 + 1
-        stop2 = stop - stop % 1
-        data = self.data[start2:stop2]
-        return np.concatenate([[self[start]], data, [self[stop]]])
+        return self.get_points(self.get_positions(start, stop))
 
     def get_positions(self, start=0, stop=None, step=None):
         stop = stop if stop is not None else len(self)-1
@@ -88,37 +97,55 @@ class PolyLine(HashedList):
 
     def check(self):
         # remove zero-length segments
-        index = 0
-        while index < len(self)-1:
-            if norm(self[index+1] - self[index]) < 0.0000001:
-                self.data = np.concatenate([self[:index], self[index+1:]])
-            else:
-                index += 1
+        if len(self) > 1:
+            keep = np.linalg.norm(np.diff(self.data, axis=0), axis=1) >= 0.0000001
+            self.data = self.data[np.append(keep, True)]
 
         return self
 
+    @cached_property('self')
+    def segment_lengths(self):
+        return np.linalg.norm(np.diff(self.data, axis=0), axis=-1)
+
+    @cached_property('self')
+    def cumulative_lengths(self):
+        """
+        Length of the line from the first point to every point
+        """
+        return np.concatenate([[0.], np.cumsum(self.segment_lengths)])
+
+    def get_arc_length(self, ik):
+        """
+        Signed length from the first point to ik (ik can be an array),
+        extrapolated along the first/last segment
+        """
+        ik = np.asarray(ik, dtype=float)
+        i = np.clip(np.floor(ik), 0, len(self.data) - 2).astype(int)
+        return self.cumulative_lengths[i] + (ik - i) * self.segment_lengths[i]
+
+    def get_ik_at_length(self, length):
+        """
+        Inverse of get_arc_length: the index at a (signed) length from the first point.
+        length can be an array
+        """
+        length = np.asarray(length, dtype=float)
+        lengths = self.cumulative_lengths
+        segment_lengths = self.segment_lengths
+        i = np.searchsorted(lengths, length, side="right") - 1
+        i = np.clip(i, 0, len(self.data) - 2)
+        segment_length = segment_lengths[i]
+        k = np.divide(length - lengths[i], segment_length,
+                      out=np.zeros(np.shape(segment_length)), where=segment_length > 0)
+        return i + k
+
     def extend(self, start, length):
         """
         Move from a starting point for a given length in direction of the line
+        (length can be an array)
         """
-        if length == 0:
+        if np.isscalar(length) and length == 0:
             return start
-        direction = sign(length)
-        length = abs(length)
-        next_value = start - start % 1 + (direction > 0)
-        difference = norm(self[start] - self[next_value])
-        length -= difference
-        #
-        while length > 0:
-            if (next_value > len(self) and direction > 0) or (next_value < 0 and direction < 0):
-                break
-            start = next_value
-            next_value += direction
-            difference = norm(self[next_value] - self[start])
-            length -= difference
-            # Length is smaller than zero
-        length = length
-        return next_value + direction * length * abs(next_value - start) / difference
+        return self.get_ik_at_length(self.get_arc_length(start) + length)
 
     def get_length(self, first=0, second=None):
         """
@@ -126,22 +153,7 @@ class PolyLine(HashedList):
         """
         if second is None:
             second = len(self) - 1
-        direction = sign(float(second - first))
-        length = 0
-        next_value = int(first - first % 1 + (direction > 0))
-        # Just to fasten up
-        if next_value > len(self) and direction < 0:
-            next_value = len(self)
-        elif next_value < 0 < direction:
-            next_value = 0
-        while next_value * direction < second * direction:
-            length += norm(self[next_value] - self[first])
-            first = next_value
-            next_value += direction
-            # Fasten up aswell
-            if (next_value > len(self) and direction > 0) or (next_value < 0 and direction < 0):
-                break
-        return length + norm(self[second] - self[first])
+        return abs(self.get_arc_length(second) - self.get_arc_length(first))
 
     def scale(self, x, y=None):
         if y is None:
@@ -185,56 +197,125 @@ class PolyLine2D(PolyLine):
             return PolyLine2D(res.data)
         return res
 
+    def _get_cuts(self, p1, p2, extrapolate=False, cut_only_positive=False):
+        """
+        Cut all segments with many lines p1[j]-p2[j] at once.
+        Returns a boolean mask and the (i+k, l) values, shape: (len(p1), len(self)-1)
+        """
+        segments = len(self) - 1
+        p1 = np.asarray(p1, dtype=float)[:, np.newaxis]
+        p2 = np.asarray(p2, dtype=float)[:, np.newaxis]
+        _, k, l = cut_multiple(self.data[:-1], self.data[1:], p1, p2)
+
+        i = np.arange(segments)
+        with np.errstate(invalid="ignore"):
+            good_cut = ((0 < k) & (k <= 1)) | ((k == 0) & (i == 0))
+            extrapolated_front = (i == 0) & (k <= 0)
+            extrapolated_back = (i == segments - 1) & (k > 0)
+            valid = good_cut
+            if extrapolate:
+                valid = valid | extrapolated_front | extrapolated_back
+            if cut_only_positive:
+                valid = valid & (l >= 0)
+
+        return valid, i + k, l
+
+    @staticmethod
+    def _rangefrom_order(length, startpoint):
+        """
+        Order of the indices as yielded by rangefrom(length, startpoint)
+        """
+        distance = np.arange(length) - startpoint
+        return np.argsort(2 * np.abs(distance) - (distance > 0), kind="stable")
+
     def cut(self, p1, p2, startpoint=0, extrapolate=False, cut_only_positive=False):
         """
         Iterate over all cuts with the line p1p2
         if extrapolate is true, cuts will be exceeding the lists length
         """
         startpoint = int(startpoint)
-        for i in rangefrom(len(self)-1, startpoint):
-            try:
-                # (x,y), i, k
-                pos, ik1, ik2 = cut(self[i], self[i+1], p1, p2)
-                good_cut = 0 < ik1 <= 1 or ik1 == i == 0
-                extrapolated_front = i == 0 and ik1 <= 0
-                extrapolated_back = i == len(self)-2 and ik1 > 0
-                extrapolated_cut = extrapolated_front or extrapolated_back
-
-                if good_cut or extrapolate and extrapolated_cut:
-                    if cut_only_positive and ik2 < 0:
-                        continue
-                    yield i+ik1, ik2
-            except np.linalg.LinAlgError:
-                continue
+        valid, ik1, ik2 = self._get_cuts([p1], [p2], extrapolate, cut_only_positive)
+        order = self._rangefrom_order(len(self) - 1, startpoint)
+        order = order[valid[0, order]]
+        for ik, k2 in zip(ik1[0, order], ik2[0, order]):
+            yield ik, k2
 
     def cut_with_polyline(self, pl, startpoint=0):
-        for i, (p1, p2) in enumerate(zip(pl[:-1], pl[1:])):
-            l = norm(p2-p1)
-            for ik1, k2 in self.cut(p1, p2, startpoint, cut_only_positive=True):
-                ik2 = i + (norm(self[ik1] - p1) / l)
-                yield ik1, ik2
+        """
+        Iterate over all cuts with the segments of another line,
+        ordered by the segments of pl and the distance to startpoint.
+        yields (ik_self, ik_pl)
+        """
+        other = np.asarray(pl.data if isinstance(pl, PolyLine) else pl, dtype=float)
+        if len(other) < 2 or len(self) < 2:
+            return
+        pl_segments, self_segments, k, l = self.segment_index.intersect(other[:-1], other[1:])
+
+        rank = np.empty(len(self) - 1, dtype=int)
+        rank[self._rangefrom_order(len(self) - 1, int(startpoint))] = np.arange(len(self) - 1)
+        order = np.lexsort((k, rank[self_segments], pl_segments))
+        for ik1, ik2 in zip((self_segments + k)[order], (pl_segments + l)[order]):
+            yield ik1, ik2
 
-    def check(self):  # TODO: IMPROVE (len = len(self.data), len-=,...)
+    @cached_property('self')
+    def segment_index(self):
+        return SegmentIndex(self.data)
+
+    def get_intersections(self, other):
+        """
+        Get all intersections with the segments of another line
+        (uses the segment-index, no extrapolation)
+        :return: (ik_self, ik_other) arrays
+        """
+        other = np.asarray(other.data if isinstance(other, PolyLine) else other, dtype=float)
+        if len(self) < 2 or len(other) < 2:
+            return np.zeros(0), np.zeros(0)
+        other_segments, self_segments, k, l = self.segment_index.intersect(other[:-1], other[1:])
+        order = np.lexsort((self_segments + k, other_segments + l))
+        return (self_segments + k)[order], (other_segments + l)[order]
+
+    def check(self):
         """
         Check for mistakes in the array, such as for the moment: self-cuttings,..
+        Every loop (segment i cutting segment j) is replaced by the cut-point,
+        the loops are removed in order of their first segment.
         """
         super(PolyLine2D, self).check()
-        for i in range(len(self.data) - 3):
-            if i > len(self.data) - 4:
+        start = (0, 0)
+        while True:
+            cuts = self._get_self_cuts(*start)
+            if cuts is None:
                 break
-            for j in range(i + 2, len(self.data) - 2):
-                if j > len(self.data) - 3:
-                    break
-                try:
-                    temp = cut(self.data[i], self.data[i + 1], self.data[j], self.data[j + 1])
-                    if 0 < temp[1] < 1. and 0 < temp[2] < 1.:
-                        #self.data = self.data[:i] + [temp[0]] + self.data[j + 1:]
-                        self.data = np.concatenate([self.data[:i], [temp[0]], self.data[j+1:]])
-                except np.linalg.linalg.LinAlgError:
-                    continue
+            i, j, point = cuts
+            self.data = np.concatenate([self.data[:i], [point], self.data[j+1:]])
+            start = (i, j + 1)
 
         return self
 
+    def _get_self_cuts(self, first_i=0, first_j=0):
+        """
+        Find the first pair of segments (i, j) that cut each other (j >= i+2),
+        starting at (first_i, first_j). The last segment is not checked.
+        :return: (i, j, cut_point) or None
+        """
+        data = self.data
+        if len(data) < 5:
+            return None
+        index = SegmentIndex(data[:-1])
+        segments = np.arange(first_i, len(data) - 3)
+        queries, others, k, l = index.intersect(data[segments], data[segments + 1])
+        i = segments[queries]
+
+        valid = (others >= i + 2) & ((i > first_i) | (others >= first_j))
+        valid &= (0 < k) & (k < 1) & (0 < l) & (l < 1)
+        if not np.any(valid):
+            return None
+
+        i, j, l = i[valid], others[valid], l[valid]
+        best = np.lexsort((j, i))[0]
+        i, j = i[best], j[best]
+        return i, j, data[i] + l[best] * (data[i+1] - data[i])
+
     @cached_property('self')
     def normvectors(self):   #RENAME: norm_point_vectors?
         """
@@ -242,22 +323,16 @@ class PolyLine2D(PolyLine):
         this property returns a normal for every point,
         approximated by the 2 neighbour points (len(data) == len(normals))
         """
-        rotate = lambda x: normalize(x).dot([[0, -1], [1, 0]])
-        normvectors = [rotate(self.data[1] - self.data[0])]
-        for j in range(1, len(self.data) - 1):
-            normvectors.append(
-                #rotate(normalize(self.data[j + 1] - self.data[j]) + normalize(self.data[j] - self.data[j - 1])))
-                rotate(self.data[j + 1] - self.data[j - 1]))
-        normvectors.append(rotate(self.data[-1] - self.data[-2]))
-        return normvectors
-
+        data = self.data
+        directions = np.concatenate([data[1:2] - data[:1],
+                                     data[2:] - data[:-2],
+                                     data[-1:] - data[-2:-1]])
+        return _rotate_normalized(directions)
 
     @cached_property('self')
     def tangents(self):
-        tangents = []
-        for p1, p2 in self.segments:
-            tangents.append((p2 - p1) / norm(p2 - p1))
-        return np.array(tangents)
+        segments = np.diff(self.data, axis=0)
+        return segments / np.linalg.norm(segments, axis=1)[:, np.newaxis]
 
     @cached_property('self')
     def norm_segment_vectors(self):
@@ -265,11 +340,7 @@ class PolyLine2D(PolyLine):
         return all the normals based on the segments of the data:
         len(data) - 1 == len(normals)
         """
-        rotate = lambda x: normalize(x).dot([[0, -1], [1, 0]])
-        normvectors = []
-        for p1, p2 in self.segments:
-            normvectors.append(rotate(normalize(p2 - p1)))
-        return np.array(normvectors)
+        return _rotate_normalized(np.diff(self.data, axis=0))
 
     def get_normal(self, ik):
         """get normal-vector by ik-value"""
@@ -305,40 +376,20 @@ class PolyLine2D(PolyLine):
         """
         Shift the whole line for a given amount (->Sewing allowance)
         """
-        # cos(vectorangle(a,b)) = (a1 b1+a2 b2)/Sqrt[(a1^2+a2^2) (b1^2+b2^2)]
-        newlist = []
-        second = self.data[0]
-        third = self.data[1]
-        newlist.append(second + self.norm_segment_vectors[0] * amount)
-        for i in range(1, len(self.data) - 1):
-            first = second
-            second = third
-            third = self.data[i + 1]
-            d1 = second - first
-            d2 = third - second
-            cosphi = d1.dot(d2) / np.sqrt(d1.dot(d1) * d2.dot(d2))
-            coresize = 1e-8
-            if cosphi > 0.9999 or norm(d1) < coresize or norm(d2) < coresize:
-                newlist.append(second + self.normvectors[i] * amount / cosphi)
-            elif cosphi < -0.9999: # this is true if the direction changes 180 degree
-                n1 = self.norm_segment_vectors[i-1]
-                n2 = self.norm_segment_vectors[i]
-                newlist.append(second + self.norm_segment_vectors[i-1] * amount)
-                newlist.append(second + self.norm_segment_vectors[i] * amount)
-            else:
-                n1 = self.norm_segment_vectors[i-1]
-                n2 = self.norm_segment_vectors[i]
-                sign = -1. + 2. * (d2.dot(n1) > 0)
-                phi = np.arccos(n1.dot(n2))
-                d1 = normalize(d1)
-                ext_vec = n1 - sign * d1 * np.tan(phi / 2)
-                newlist.append(second + ext_vec * amount)
-
-                # newlist.append(cut(a, b, c, d)[0])
-        newlist.append(third + self.norm_segment_vectors[-1] * amount)
-        self.data = newlist
+        return self.add_stuff_multiple([self], [amount])[0]
 
-        return self
+    @classmethod
+    def add_stuff_multiple(cls, lines, amounts):
+        """
+        add_stuff for many lines at once (all lines are processed in one go)
+        :param lines: list of PolyLine2D (changed in place)
+        :param amounts: one amount per line
+        :return: lines
+        """
+        for line, data in zip(lines, offset_lines([line.data for line in lines], amounts)):
+            line.data = data
+
+        return lines
 
     def mirror(self, p1, p2):
         """
@@ -347,7 +398,8 @@ class PolyLine2D(PolyLine):
         p1 = np.array(p1)
         p2 = np.array(p2)
         normvector = normalize(np.array(p1-p2).dot([[0, -1], [1, 0]]))
-        self.data = [point - 2*normvector.dot(point-p1)*normvector for point in self.data]
+        distances = (self.data - p1).dot(normvector)
+        self.data = self.data - 2 * np.outer(distances, normvector)
 
         return self
 
@@ -358,13 +410,11 @@ class PolyLine2D(PolyLine):
         if not radians:
             angle = np.pi*angle/180
         rotation_matrix = rotation_2d(angle)
-        new_data = []
-        for point in self.data:
-            if startpoint is not None:
-                new_data.append(startpoint + rotation_matrix.dot(point - startpoint))
-            else:
-                new_data.append(rotation_matrix.dot(point))
-        self.data = new_data
+        if startpoint is not None:
+            startpoint = np.asarray(startpoint)
+            self.data = startpoint + (self.data - startpoint).dot(rotation_matrix.T)
+        else:
+            self.data = self.data.dot(rotation_matrix.T)
 
         return self
 
@@ -394,4 +444,76 @@ class PolyLine2D(PolyLine):
         g.add(line)
         drawing.add(g)
 
-        return drawing.tostring()
\ No newline at end of file
+        return drawing.tostring()
+
+def _rotate_normalized(vectors):
+    """
+    Rotate 2d-vectors by -90 degrees (rhs-normal) and normalize them
+    """
+    normals = np.array(vectors, dtype=float)[:, ::-1] * [1, -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return normals / np.linalg.norm(normals, axis=1)[:, np.newaxis]
+
+
+def offset_lines(lines, amounts):
+    """
+    Shift many 2d-lines for a given amount each (->Sewing allowance),
+    all lines are concatenated and processed in one go.
+    Corners get mitered, if a line turns around (180 degree) the corner is
+    replaced by two points.
+    :param lines: list of arrays of points (every line needs at least 2 points)
+    :param amounts: list of amounts (one per line)
+    :return: list of arrays
+    """
+    # cos(vectorangle(a,b)) = (a1 b1+a2 b2)/Sqrt[(a1^2+a2^2) (b1^2+b2^2)]
+    lengths = np.array([len(line) for line in lines])
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    data = np.concatenate([np.asarray(line, dtype=float) for line in lines])
+    amount = np.repeat(np.asarray(amounts, dtype=float), lengths)[:, np.newaxis]
+
+    segments = np.diff(data, axis=0)  # segments between two lines are never used
+    segment_normals = _rotate_normalized(segments)
+
+    result = np.empty_like(data)
+    result[starts] = data[starts] + segment_normals[starts] * amount[starts]
+    result[ends - 1] = data[ends - 1] + segment_normals[ends - 2] * amount[ends - 1]
+
+    inner = np.ones(len(data), dtype=bool)
+    inner[starts] = False
+    inner[ends - 1] = False
+    inner = np.nonzero(inner)[0]
+
+    point = data[inner]
+    amount_inner = amount[inner]
+    d1 = segments[inner - 1]
+    d2 = segments[inner]
+    n1 = segment_normals[inner - 1]
+    n2 = segment_normals[inner]
+    length_1 = np.linalg.norm(d1, axis=1)
+    length_2 = np.linalg.norm(d2, axis=1)
+
+    coresize = 1e-8
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cosphi = np.sum(d1 * d2, axis=1) / (length_1 * length_2)
+        straight = (cosphi > 0.9999) | (length_1 < coresize) | (length_2 < coresize)
+        reverse = ~straight & (cosphi < -0.9999)  # this is true if the direction changes 180 degree
+
+        point_normals = _rotate_normalized(data[inner + 1] - data[inner - 1])
+        straight_points = point + point_normals * amount_inner / cosphi[:, np.newaxis]
+
+        sign = np.where(np.sum(d2 * n1, axis=1) > 0, 1., -1.)
+        phi = np.arccos(np.sum(n1 * n2, axis=1))
+        ext_vec = n1 - (sign * np.tan(phi / 2) / length_1)[:, np.newaxis] * d1
+        corner_points = point + ext_vec * amount_inner
+
+    result[inner] = np.where(straight[:, np.newaxis], straight_points, corner_points)
+    result[inner[reverse]] = point[reverse] + n1[reverse] * amount_inner[reverse]
+
+    # reversing corners get a second point
+    reverse_index = inner[reverse]
+    result = np.insert(result, reverse_index + 1,
+                       point[reverse] + n2[reverse] * amount_inner[reverse], axis=0)
+    inserted = np.bincount(np.searchsorted(ends, reverse_index, side="right"), minlength=len(lines))
+
+    return np.split(result, np.cumsum(lengths + inserted)[:-1])
@@ -37,6 +37,23 @@ def point2d(p1_3d, p1_2d, p2_3d, p2_2d, point_3d):
     return np.array(point_2d + diff_2d * diff_3d.dot(diff_point))
 
 
+def point2d_multiple(p1_3d, p1_2d, p2_3d, p2_2d, point_3d):
+    """Vectorized point2d: all arguments are arrays of points (one row per problem)"""
+    diff_3d = p2_3d - p1_3d
+    diff_3d /= np.linalg.norm(diff_3d, axis=1)[:, np.newaxis]
+    diff_2d = p2_2d - p1_2d
+    diff_2d /= np.linalg.norm(diff_2d, axis=1)[:, np.newaxis]
+    diff_point = point_3d - p1_3d
+    lengthwise = np.sum(diff_3d * diff_point, axis=1)[:, np.newaxis]
+    point_2d = p1_2d + diff_2d * lengthwise
+    # length-wise
+    diff_3d = diff_point - diff_3d * lengthwise
+    diff_3d /= np.linalg.norm(diff_3d, axis=1)[:, np.newaxis]
+    diff_2d = diff_2d.dot([[0, 1], [-1, 0]])  # Rotate 90deg
+
+    return point_2d + diff_2d * np.sum(diff_3d * diff_point, axis=1)[:, np.newaxis]
+
+
 def flatten_list(list1, list2):
     index_left = index_right = 0
     flat_left = [np.array([0, 0])]
@@ -75,4 +92,49 @@ def flatten_list(list1, list2):
     #                               list2[index_right + 1]))
     #     index_right += 1
 
-    return PolyLine2D(flat_left), PolyLine2D(flat_right)
\ No newline at end of file
+    return PolyLine2D(flat_left), PolyLine2D(flat_right)
+
+
+def flatten_lists(lists1, lists2):
+    """
+    Flatten many pairs of 3d-lines (p.e. the ribs of all cells) at once.
+    The pairs are unrolled in lockstep, every pair with the same lengths
+    is processed as one array.
+    :return: [(flat_left, flat_right), ...]
+    """
+    lists1 = [np.asarray(getattr(l, "data", l), dtype=float) for l in lists1]
+    lists2 = [np.asarray(getattr(l, "data", l), dtype=float) for l in lists2]
+
+    groups = {}
+    for pair_no, (list1, list2) in enumerate(zip(lists1, lists2)):
+        groups.setdefault((len(list1), len(list2)), []).append(pair_no)
+
+    result = [None] * len(lists1)
+    for (len1, len2), pair_numbers in groups.items():
+        left = np.array([lists1[i] for i in pair_numbers]).transpose(1, 0, 2)  # point, pair, xyz
+        right = np.array([lists2[i] for i in pair_numbers]).transpose(1, 0, 2)
+        flat_left = np.zeros((len1, len(pair_numbers), 2))
+        flat_right = np.zeros((len2, len(pair_numbers), 2))
+        flat_right[0, :, 0] = np.linalg.norm(left[0] - right[0], axis=1)
+
+        index_left = index_right = 0
+        while True:
+            if index_left < len1 - 1:
+                flat_left[index_left + 1] = point2d_multiple(left[index_left], flat_left[index_left],
+                                                             right[index_right], flat_right[index_right],
+                                                             left[index_left + 1])
+                index_left += 1
+
+            if index_right < len2 - 1:
+                flat_right[index_right + 1] = point2d_multiple(left[index_left], flat_left[index_left],
+                                                               right[index_right], flat_right[index_right],
+                                                               right[index_right + 1])
+                index_right += 1
+
+            if index_left == len1 - 1 and index_right == len2 - 1:
+                break
+
+        for i, pair_no in enumerate(pair_numbers):
+            result[pair_no] = PolyLine2D(flat_left[:, i]), PolyLine2D(flat_right[:, i])
+
+    return result
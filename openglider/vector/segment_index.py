@@ -0,0 +1,99 @@
+import numpy as np
+
+from openglider.vector.functions import cut_multiple
+
+
+class SegmentIndex(object):
+    """
+    Uniform grid over the segments of a 2d-line to find intersecting segments
+    without testing every pair of segments.
+    """
+    max_cells = 1024
+
+    def __init__(self, data, cell_size=None):
+        """
+        :param data: points of the line [[x, y], ...]
+        :param cell_size: size of the grid-cells (default: mean segment length)
+        """
+        self.data = np.asarray(data, dtype=float)
+        self.starts = self.data[:-1]
+        self.ends = self.data[1:]
+        self.mins = np.minimum(self.starts, self.ends)
+        self.maxs = np.maximum(self.starts, self.ends)
+
+        if cell_size is None:
+            lengths = np.linalg.norm(self.ends - self.starts, axis=1)
+            cell_size = lengths.mean() if len(lengths) else 1.
+        self.origin = self.mins.min(axis=0) if len(self.mins) else np.zeros(2)
+        extent = (self.maxs.max(axis=0) - self.origin).max() if len(self.mins) else 0.
+        # not more than max_cells cells per axis
+        cell_size = max(cell_size, extent / self.max_cells)
+        self.cell_size = cell_size if cell_size > 0 else 1.
+        self.shape = np.floor(extent / self.cell_size).astype(np.int64) + 1
+
+        segments, keys = self._get_cells(self.mins, self.maxs)
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.segments = segments[order]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _get_cells(self, mins, maxs):
+        """
+        Return (segment_numbers, cell_keys) for every cell touched by a bounding box
+        """
+        lower = np.floor((mins - self.origin) / self.cell_size)
+        upper = np.floor((maxs - self.origin) / self.cell_size)
+        # cells outside of the grid are empty
+        lower = np.clip(lower, 0, self.shape).astype(np.int64)
+        upper = np.clip(upper, -1, self.shape - 1).astype(np.int64)
+        size = np.maximum(upper - lower + 1, 0)
+        counts = size[:, 0] * size[:, 1]
+
+        segments = np.repeat(np.arange(len(mins)), counts)
+        # position within the bounding box of each segment
+        offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        x = lower[segments, 0] + offset % size[segments, 0]
+        y = lower[segments, 1] + offset // size[segments, 0]
+        return segments, x * self.shape + y
+
+    def get_candidates(self, mins, maxs):
+        """
+        Return pairs (query_number, segment_number) of overlapping grid cells
+        for a list of bounding boxes
+        """
+        queries, keys = self._get_cells(np.asarray(mins, dtype=float), np.asarray(maxs, dtype=float))
+        first = np.searchsorted(self.keys, keys, side="left")
+        last = np.searchsorted(self.keys, keys, side="right")
+        counts = last - first
+
+        pairs_query = np.repeat(queries, counts)
+        offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        pairs_segment = self.segments[np.repeat(first, counts) + offset]
+
+        if not len(pairs_query):
+            return pairs_query, pairs_segment
+
+        pairs = np.unique(np.stack([pairs_query, pairs_segment], axis=1), axis=0)
+        return pairs[:, 0], pairs[:, 1]
+
+    def intersect(self, p1, p2):
+        """
+        Find all intersections of the segments p1[i]-p2[i] with the indexed line.
+        Segments are half-open (0 < k <= 1, k == 0 only for the first segment), the
+        same for the queries, which are taken as consecutive segments of one line:
+        a cut through a shared vertex is found once.
+        :return: (query_numbers, segment_numbers, k, l) where the cut-point is
+                 p1 + l * (p2 - p1) = start + k * (end - start)   (0 <= k, l <= 1)
+        """
+        p1 = np.asarray(p1, dtype=float).reshape(-1, 2)
+        p2 = np.asarray(p2, dtype=float).reshape(-1, 2)
+        queries, segments = self.get_candidates(np.minimum(p1, p2), np.maximum(p1, p2))
+
+        _, k, l = cut_multiple(self.starts[segments], self.ends[segments], p1[queries], p2[queries])
+        with np.errstate(invalid="ignore"):
+            valid = ((0 < k) | ((k == 0) & (segments == 0))) & (k <= 1)
+            valid &= ((0 < l) | ((l == 0) & (queries == 0))) & (l <= 1)
+
+        return queries[valid], segments[valid], k[valid], l[valid]
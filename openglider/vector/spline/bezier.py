@@ -21,7 +21,7 @@ from __future__ import division
 
 import numpy as np
 
-from openglider.utils.cache import HashedList
+from openglider.utils.cache import HashedList, cached_method, cached_property, fingerprint
 from openglider.vector import norm, Interpolation
 from openglider.vector.transformation import Reflection
 from openglider.utils import dualmethod
@@ -30,17 +30,44 @@ from openglider.utils import dualmethod
 class _BernsteinFactory():
     def __init__(self):
         self.bases = {}
+        self.binomials = {}
 
     def __call__(self, degree):
         """degree is the number of controlpoints"""
         if degree not in self.bases:
             def bsf(n):
-                return lambda x: choose(degree - 1, n) * (x ** n) * ((1 - x) ** (degree - 1 - n))
+                return lambda x: self.evaluate(degree, x)[n]
 
             self.bases[degree] = [bsf(i) for i in range(degree)]
 
         return self.bases[degree]
 
+    def evaluate(self, num_ctrl, values, derivative=False):
+        """
+        Evaluate all bernstein polynomials for an array of parameters
+        :param derivative: return the derivatives of the polynomials instead
+        :return: matrix (len(values) x num_ctrl)
+        """
+        values = np.asarray(values, dtype=float)
+        if derivative:
+            n = num_ctrl - 1
+            basis = np.zeros((values.size, num_ctrl))
+            if n > 0:
+                lower = self.evaluate(n, values.ravel())
+                basis[:, 1:] += n * lower
+                basis[:, :-1] -= n * lower
+        else:
+            t = np.atleast_1d(values)[:, np.newaxis]
+            n = num_ctrl - 1
+            k = np.arange(num_ctrl)
+            if num_ctrl not in self.binomials:
+                self.binomials[num_ctrl] = np.array([choose(n, i) for i in k], dtype=float)
+            basis = self.binomials[num_ctrl] * t ** k * (1 - t) ** (n - k)
+
+        if values.ndim == 0:
+            return basis[0]
+        return basis
+
 BernsteinBase = _BernsteinFactory()
 
 
@@ -52,7 +79,6 @@ class Bezier(HashedList):
         Bezier Curve representative
         http://en.wikipedia.org/wiki/Bezier_curve#Generalization
         """
-        self._matrix = None
         super(Bezier, self).__init__(controlpoints)
 
     def __repr__(self):
@@ -66,14 +92,13 @@ class Bezier(HashedList):
         return cls(controlpoints)
 
     def __call__(self, value):
-        dim = len(self.data[0])
-        assert 0 <= value <= 1, "value must be in the range (0,1), not {}".format(value)
+        """
+        Get the point(s) at one or many parameter values (0..1)
+        """
+        assert np.all((0 <= np.asarray(value)) & (np.asarray(value) <= 1)), \
+            "value must be in the range (0,1), not {}".format(value)
 
-        val = np.zeros(dim)
-        base = self.basefactory(len(self.data))
-        for i, point in enumerate(self.data):
-            val += point * base[i](value)
-        return val
+        return self.basefactory.evaluate(len(self.data), value).dot(self.data)
 
     @property
     def numpoints(self):
@@ -85,13 +110,12 @@ class Bezier(HashedList):
     @numpoints.setter
     def numpoints(self, num_ctrl, num_points=50):
         if not num_ctrl == self.numpoints:
-            data = [self(i) for i in np.linspace(0, 1, num_points)]
+            data = self.get_sequence(num_points)
             self.fit(data, num_ctrl)
 
     def change_base(self, base, num_points=50):
-        data = [self(i) for i in np.linspace(0, 1, num_points)]
+        data = self.get_sequence(num_points)
         self.basefactory = base
-        self._matrix = None
         self.fit(data, self.numpoints)
 
     @property
@@ -108,49 +132,8 @@ class Bezier(HashedList):
         Fit to a given set of points with a certain number of spline-points (default=3)
         if start (/ end) is True, the first (/ last) point of the Curve is included
         """
-        base = this.basefactory(numpoints)
-        matrix = np.matrix(
-            [[base[column](row * 1. / (len(points) - 1))
-                for column in range(len(base))]
-                    for row in range(len(points))])
-
-        if not start and not end:
-            matrix = np.linalg.pinv(matrix)
-            out = np.array(matrix * points)
-            return out
-        else:
-            A1 = np.array(matrix)
-            A2 = []
-            points2 = []
-            points1 = np.array(points)
-            solution = []
-
-            if start:
-                # add first column to A2 and remove first column of A1
-                A2.append(A1[:, 0])
-                A1 = A1[:, 1:]
-                points2.append(points[0])
-                points1 = points1[1:]
-
-            if end:
-                # add last column to A2 and remove last column of A1
-                A2.append(A1[:, -1])
-                A1 = A1[:, :-1]
-                points2.append(points[-1])
-                points1 = points[:-1]
-            A1_inv = np.linalg.inv(np.dot(A1.T, A1))
-            A2 = np.array(A2).T
-            points1 = np.array(points).T
-            points2 = np.array(points2).T
-            for dim, point in enumerate(points1):
-                rhs1 = np.array(A1.T.dot(point))
-                rhs2 = np.array((A1.T.dot(A2)).dot(points2[dim])).T
-                solution.append(np.array(A1_inv.dot(rhs1 - rhs2)))
-            solution = np.matrix(solution).T.tolist()
-            if start:
-                solution.insert(0, points[0])
-            if end:
-                solution.append(points[-1])
+        fit_matrix = get_fit_matrix(this.basefactory, numpoints, len(points), start, end)
+        solution = fit_matrix.dot(np.array(points, dtype=float))
 
         if type(this) == type:  # classmethod
             return this(solution)
@@ -158,85 +141,239 @@ class Bezier(HashedList):
             this.controlpoints = solution
             return this
 
+    @classmethod
+    def fit_multiple(cls, curves, numpoints=5, start=True, end=True):
+        """
+        Fit many curves with the same number of points at once
+        :param curves: [[point1, point2, ...], curve2, ...]
+        :return: [curve1, curve2, ...]
+        """
+        points = np.array(curves, dtype=float)
+        fit_matrix = get_fit_matrix(cls.basefactory, numpoints, points.shape[1], start, end)
+        return [cls(controlpoints) for controlpoints in np.matmul(fit_matrix, points)]
+
     @dualmethod
     def constraint_fit(this, points, constraint):
         """constraint is a matrix in size of the controlpointmatrix
         constraint values have a value others are set to None
         points is [[x0,y0,z0], X1, X2, ...]"""
-
-        # all points have same dimension
-        dim = len(constraint[0])
+        points = np.array(points, dtype=float)
         num_ctrl_pts = len(constraint)
+        constraints_T = list(zip(*constraint))
+        solution = np.zeros((num_ctrl_pts, len(constraints_T)))
 
-        # create the base matrix:
-        base = this.basefactory(num_ctrl_pts)
-        matrix = np.array(
-            [[base[column](row * 1. / (len(points) - 1))
-                for column in range(len(base))]
-                    for row in range(len(points))])
+        # solve all dimensions with the same constrained indices at once
+        groups = {}
+        for dim, constraints in enumerate(constraints_T):
+            fixed = tuple(index for index, val in enumerate(constraints) if val is not None)
+            groups.setdefault(fixed, []).append(dim)
 
-        # create the b vector for each dim
-        b = np.array(list(zip(*points)))
+        for fixed, dims in groups.items():
+            free = [index for index in range(num_ctrl_pts) if index not in fixed]
+            values = np.array([[constraints_T[dim][index] for dim in dims] for index in fixed], dtype=float)
+            fit_matrix, correction = get_constraint_fit_matrices(this.basefactory, num_ctrl_pts, len(points), fixed)
+
+            solution[np.ix_(free, dims)] = fit_matrix.dot(points[:, dims])
+            if fixed:
+                solution[np.ix_(free, dims)] -= correction.dot(values)
+                solution[np.ix_(fixed, dims)] = values
 
-        # fit
-        solution = []
-        constraints_T = list(zip(*constraint))
-        for i in range(dim):
-            constraints = [[index, val] for index, val in enumerate(constraints_T[i]) if val != None]
-            solution.append(this.constraint_least_square_sol(matrix, b[i], constraints))
         if type(this) == type:
-            return this(np.array(solution).transpose())
+            return this(solution)
         else:
-            this.controlpoints = np.array(solution).transpose()
+            this.controlpoints = solution
             return this
 
-
     @staticmethod
     def constraint_least_square_sol(A, b, constraint):
         """return u for minimized |A.u-b| with u containing the constraint points.
         A(n x m)...matrix with n >= m + c_n (n=num_cols, m=num_rows, c_n=num_constraints)
         constraint: dict of "indeces: value" couples  [[0, 1.], [10, 3.]]"""
-        # create  vector from the known values
-        u_fix = np.zeros(A.shape[1])
-        u_sol_index = list(range(len(u_fix)))
+        fixed = [key for key, val in constraint]
+        free = [index for index in range(A.shape[1]) if index not in fixed]
         u = np.zeros(A.shape[1])
         for key, val in constraint:
-            u_fix[key] = val
+            u[key] = val
 
         # A.T.dot(A).dot(u) == A.T.dot(b) - A.T.dot(A).dot(u_fix)
-        rhs =  A.T.dot(b) - ((A.T).dot(A)).dot(u_fix)
         mat = A.T.dot(A)
-        for i, key in enumerate(constraint):
-            mat = np.delete(mat, key[0] - i, 0)
-            mat = np.delete(mat, key[0] - i, 1)
-            rhs = np.delete(rhs, key[0] - i, 0)
-            u_sol_index.pop(key[0] - i)
-        u_sol = np.linalg.solve(mat, rhs.transpose())
-
-        # insert the known values in the solution
-        for i, index in enumerate(u_sol_index):
-            u[index] = u_sol[i]
-        for key, val in constraint:
-            u[key] = val
+        rhs = A.T.dot(b) - mat.dot(u)
+        u[free] = np.linalg.solve(mat[np.ix_(free, free)], rhs[free])
         return u
 
-    def interpolation(self, num=100, **kwargs):
+    def interpolation(self, num=100, tolerance=None, **kwargs):
+        """
+        Interpolation of the curve with num equally spaced samples
+        or (if a tolerance is given) an adaptive sampling
+        """
+        if tolerance is not None:
+            return Interpolation(self.get_adaptive_sequence(tolerance))
         return Interpolation(self.get_sequence(num))
 
+    def get_adaptive_sequence(self, tolerance, start=0., end=1.):
+        """
+        Sample the curve between the parameters start and end, subdividing until
+        no chord deviates more than tolerance from the curve.
+        The results are cached until the curve changes.
+        """
+        return self._adaptive_sequence(float(tolerance), float(start), float(end))
+
+    @cached_method('self')
+    def _adaptive_sequence(self, tolerance, start, end):
+        points = self._get_adaptive_sequence(tolerance, start, end)[1]
+        points.setflags(write=False)
+        return points
+
+    def _get_adaptive_sequence(self, tolerance, start, end, max_depth=30):
+        parameters = np.linspace(start, end, 2 * len(self.data) + 1)
+        points = self(parameters)
+
+        for _ in range(max_depth):
+            parameters_mid = (parameters[:-1] + parameters[1:]) / 2
+            points_mid = self(parameters_mid)
+
+            # distance of the curve-midpoints to the chords
+            chords = points[1:] - points[:-1]
+            diff = points_mid - points[:-1]
+            lengths = np.sum(chords**2, axis=1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                k = np.clip(np.sum(diff * chords, axis=1) / lengths, 0, 1)
+            k[lengths == 0] = 0
+            distance = np.linalg.norm(diff - chords * k[:, np.newaxis], axis=1)
+
+            split = np.flatnonzero(distance > tolerance)
+            if not len(split):
+                break
+
+            # the deviation scales with the square of the chord-length
+            divisions = np.ceil(np.sqrt(distance[split] / tolerance)).astype(int)
+            segments = np.repeat(split, divisions - 1)
+            offset = np.arange(len(segments)) - np.repeat(np.cumsum(divisions - 1) - (divisions - 1), divisions - 1)
+            k = (offset + 1) / np.repeat(divisions, divisions - 1)
+            parameters_new = parameters[segments] + k * (parameters[segments + 1] - parameters[segments])
+
+            parameters = np.insert(parameters, segments + 1, parameters_new)
+            points = np.insert(points, segments + 1, self(parameters_new), axis=0)
+
+        return parameters, points
+
+    @cached_property('self')
+    def _samples(self):
+        """
+        Samples (parameters, points) to find the start values for y_at_x / x_at_y
+        """
+        num = max(50, 4 * len(self.data))
+        return np.linspace(0, 1, num), self.get_sequence(num)
+
+    def y_at_x(self, x_values):
+        """
+        Get the y-value(s) of the curve for one or many x-values.
+        Solves x(t) = x with newton-iterations (bisection as a fallback),
+        x-values outside of the curve are extrapolated along the end tangents.
+        The results are cached until the curve changes.
+        """
+        return self._get_values(x_values, 0)
+
+    def x_at_y(self, y_values):
+        """
+        Get the x-value(s) of the curve for one or many y-values (see y_at_x)
+        """
+        return self._get_values(y_values, 1)
+
+    def _get_values(self, values, dim):
+        value_array = np.asarray(values, dtype=float)
+        result = self._values(value_array, dim)
+        if value_array.ndim == 0:
+            return float(result)
+        return result
+
+    @cached_method('self', key=lambda values, dim: (dim, fingerprint(values)))
+    def _values(self, value_array, dim):
+        result = self._solve_values(value_array.ravel(), dim).reshape(value_array.shape)
+        result.setflags(write=False)
+        return result
+
+    def _get_point_and_tangent(self, t):
+        num = len(self.data)
+        return (self.basefactory.evaluate(num, t).dot(self.data),
+                self.basefactory.evaluate(num, t, derivative=True).dot(self.data))
+
+    def _solve_values(self, x_values, dim, max_iterations=60):
+        """
+        Solve point(t)[dim] = x_values, return the other coordinate
+        """
+        other = 1 - dim
+        t_samples, samples = self._samples
+        x_samples = samples[:, dim]
+        tolerance = 1e-12 * max(1., np.abs(x_samples).max())
+
+        # first sample-segment containing the x-value
+        lower = np.minimum(x_samples[:-1], x_samples[1:])
+        upper = np.maximum(x_samples[:-1], x_samples[1:])
+        match = (lower <= x_values[:, np.newaxis]) & (x_values[:, np.newaxis] <= upper)
+        inside = match.any(axis=1)
+        segment = match.argmax(axis=1)
+
+        # outside: the nearer end of the curve
+        at_end = np.abs(x_values - x_samples[-1]) < np.abs(x_values - x_samples[0])
+        segment[~inside] = np.where(at_end[~inside], len(x_samples) - 2, 0)
+
+        t_low = t_samples[segment]
+        t_high = t_samples[segment + 1]
+        x_low = x_samples[segment] - x_values
+        x_high = x_samples[segment + 1] - x_values
+
+        # start: linear between the samples
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.where(x_low != x_high, t_low + x_low / (x_low - x_high) * (t_high - t_low), t_low)
+        t = np.where(inside, np.clip(t, np.minimum(t_low, t_high), np.maximum(t_low, t_high)),
+                     np.where(at_end, 1., 0.))
+
+        result = np.zeros(len(x_values))
+        todo = inside.copy()
+        for _ in range(max_iterations):
+            if not todo.any():
+                break
+            point, tangent = self._get_point_and_tangent(t[todo])
+            result[todo] = point[:, other]
+            diff = point[:, dim] - x_values[todo]
+            converged = np.abs(diff) <= tolerance
+
+            # shrink the bracket
+            same_side = np.sign(diff) == np.sign(x_low[todo])
+            t_low[todo] = np.where(same_side, t[todo], t_low[todo])
+            x_low[todo] = np.where(same_side, diff, x_low[todo])
+            t_high[todo] = np.where(same_side, t_high[todo], t[todo])
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                t_newton = t[todo] - diff / tangent[:, dim]
+            bracket_min = np.minimum(t_low[todo], t_high[todo])
+            bracket_max = np.maximum(t_low[todo], t_high[todo])
+            newton_valid = (t_newton > bracket_min) & (t_newton < bracket_max)
+            t_new = np.where(newton_valid, t_newton, (bracket_min + bracket_max) / 2)
+
+            converged |= (bracket_max - bracket_min) < 1e-15
+            t[todo] = np.where(converged, t[todo], t_new)
+            indices = np.flatnonzero(todo)
+            todo[indices[converged]] = False
+
+        # not converged and outside of the curve
+        remaining = todo | ~inside
+        if remaining.any():
+            point, tangent = self._get_point_and_tangent(t[remaining])
+            outside = ~inside[remaining]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                slope = tangent[:, other] / tangent[:, dim]
+            slope[~np.isfinite(slope)] = 0
+            result[remaining] = point[:, other] + outside * (x_values[remaining] - point[:, dim]) * slope
+
+        return result
+
     def scale(self, x=1, y=1):
         self.controlpoints = [p*[x,y] for p in self.controlpoints]
 
     def get_matrix(self, num=50):
-        num_points = len(self._data)
-        if self._matrix is not None and self._matrix.shape == (num, num_points):
-            return self._matrix
-        else:
-            self._matrix = np.ndarray([num, num_points])
-            functions = self.basefactory(num_points)
-            for row, value in enumerate(np.linspace(0, 1 , num)):
-                for col, foo in enumerate(functions):
-                    self._matrix[row, col] = foo(value)
-            return self._matrix
+        return get_base_matrix(self.basefactory, len(self._data), num)
 
     def get_sequence(self, num=50):
         return np.dot(self.get_matrix(num), self._data)
@@ -253,7 +390,7 @@ class SymmetricBezier(Bezier):
     def __init__(self, controlpoints=None, mirror=None):
         self._mirror = mirror or Reflection([1., 0., 0.])
         super(SymmetricBezier, self).__init__(controlpoints=None)
-        if controlpoints:
+        if controlpoints is not None and len(controlpoints):
             self.controlpoints = controlpoints
 
     @classmethod
@@ -278,8 +415,8 @@ class SymmetricBezier(Bezier):
     @numpoints.setter
     def numpoints(self, num_ctrl, num_points=50):
         if not num_ctrl == self.numpoints:
-            data = [self(i) for i in np.linspace(0, 1, num_points)]
-            self.fit(np.array(data), num_ctrl)
+            data = self.get_sequence(num_points)
+            self.fit(data, num_ctrl)
 
     @dualmethod
     def fit(cls, data, numpoints=3, start=True, end=True):
@@ -287,6 +424,94 @@ class SymmetricBezier(Bezier):
         bez.controlpoints = bez.controlpoints[numpoints:]
         return bez
 
+    @classmethod
+    def fit_multiple(cls, curves, numpoints=3, start=True, end=True):
+        beziers = super(SymmetricBezier, cls).fit_multiple(curves, numpoints=2*numpoints, start=start, end=start)
+        for bez in beziers:
+            bez.controlpoints = bez.controlpoints[numpoints:]
+        return beziers
+
+
+
+_base_matrices = {}
+_fit_matrices = {}
+
+
+def _get_base_key(basefactory):
+    return basefactory.__class__.__name__, getattr(basefactory, "degree", None)
+
+
+def get_base_matrix(basefactory, num_ctrl, num_samples):
+    """
+    Matrix of the basis functions (num_samples x num_ctrl) for equally spaced parameters (0..1).
+    The matrices are shared by all curves and read-only.
+    """
+    key = _get_base_key(basefactory) + (num_ctrl, num_samples)
+    if key not in _base_matrices:
+        matrix = basefactory.evaluate(num_ctrl, np.linspace(0, 1, num_samples))
+        matrix.setflags(write=False)
+        _base_matrices[key] = matrix
+
+    return _base_matrices[key]
+
+
+def get_fit_matrix(basefactory, num_ctrl, num_samples, start=True, end=True):
+    """
+    Least-square fit as a matrix (num_ctrl x num_samples): controlpoints = fit_matrix.dot(points).
+    With start (/ end) the first (/ last) controlpoint is the first (/ last) point.
+    The matrices (QR-solutions) are cached per signature and read-only.
+    """
+    key = ("fit",) + _get_base_key(basefactory) + (num_ctrl, num_samples, bool(start), bool(end))
+    if key not in _fit_matrices:
+        matrix = get_base_matrix(basefactory, num_ctrl, num_samples)
+        fixed = [0] * bool(start) + [num_ctrl - 1] * bool(end)
+        free = [index for index in range(num_ctrl) if index not in fixed]
+
+        # the fixed controlpoints are the first/last points
+        selection = np.zeros((len(fixed), num_samples))
+        if start:
+            selection[0, 0] = 1
+        if end:
+            selection[-1, -1] = 1
+
+        q, r = np.linalg.qr(matrix[:, free])
+        try:
+            solve = np.linalg.solve(r, q.T)
+        except np.linalg.LinAlgError:  # less points than controlpoints
+            solve = np.linalg.pinv(matrix[:, free])
+
+        fit_matrix = np.zeros((num_ctrl, num_samples))
+        fit_matrix[free] = solve - solve.dot(matrix[:, fixed]).dot(selection)
+        fit_matrix[fixed] = selection
+        fit_matrix.setflags(write=False)
+        _fit_matrices[key] = fit_matrix
+
+    return _fit_matrices[key]
+
+
+def get_constraint_fit_matrices(basefactory, num_ctrl, num_samples, fixed):
+    """
+    Matrices for a least-square fit with fixed controlpoints (cholesky-solutions, cached per signature):
+    free controlpoints = fit_matrix.dot(points) - correction.dot(fixed values)
+    """
+    key = ("constraint",) + _get_base_key(basefactory) + (num_ctrl, num_samples, tuple(fixed))
+    if key not in _fit_matrices:
+        matrix = get_base_matrix(basefactory, num_ctrl, num_samples)
+        free = [index for index in range(num_ctrl) if index not in fixed]
+        normal = matrix.T.dot(matrix)
+
+        cholesky = np.linalg.cholesky(normal[np.ix_(free, free)])
+
+        def solve(rhs):
+            return np.linalg.solve(cholesky.T, np.linalg.solve(cholesky, rhs))
+
+        fit_matrix = solve(matrix[:, free].T)
+        correction = solve(normal[np.ix_(free, list(fixed))])
+        fit_matrix.setflags(write=False)
+        correction.setflags(write=False)
+        _fit_matrices[key] = fit_matrix, correction
+
+    return _fit_matrices[key]
 
 
 def choose(n, k):
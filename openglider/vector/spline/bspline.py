@@ -1,54 +1,72 @@
-from openglider.vector.spline.bezier import Bezier, SymmetricBezier
+import numpy as np
+
+from openglider.vector.spline.bezier import Bezier, SymmetricBezier, get_base_matrix
 from openglider.utils import dualmethod
 
+
 class BSplineBase():
     def __init__(self, degree=3):
         self.degree = degree
         self.bases = {}
 
     def __call__(self, numpoints):      # number of controlpoints
-        if numpoints not in self.bases and True:
-            knots = self.make_knot_vector(self.degree, numpoints)
-            basis = [self.get_basis(self.degree, i, knots) for i in range(numpoints)]
-            self.bases[numpoints] = basis
+        if numpoints not in self.bases:
+            def basis_function(i):
+                return lambda t: self.evaluate(numpoints, t)[i]
 
-        return self.bases[numpoints]
-
-    def get_basis(self, degree, i, knots):
-        """ Returns a basis_function for the given degree """
-        if degree == 0:
-            def basis_function(t):
-                """The basis function for degree = 0 as per eq. 7"""
-                t_this = knots[i]
-                t_next = knots[i+1]
-                return t_next >= t > t_this
-        else:
-
-            def basis_function(t):
-                """The basis function for degree > 0 as per eq. 8"""
-                if i == t == 0:
-                    return 1
-                out = 0.
-                t_this = knots[i]
-                t_next = knots[i+1]
-                t_precog  = knots[i+degree]
-                t_horizon = knots[i+degree+1]
-
-                top = (t-t_this)
-                bottom = (t_precog-t_this)
-
-                if bottom != 0:
-                    out = top/bottom * self.get_basis(degree-1, i, knots)(t)
-
-                top = (t_horizon-t)
-                bottom = (t_horizon-t_next)
-                if bottom != 0:
-                    out += top/bottom * self.get_basis(degree-1, i+1, knots)(t)
-                return out
-
-        return basis_function
+            self.bases[numpoints] = [basis_function(i) for i in range(numpoints)]
 
+        return self.bases[numpoints]
 
+    def evaluate(self, num_ctrl, values, derivative=False):
+        """
+        Evaluate all basis functions (Cox-de Boor) for an array of parameters
+        :param derivative: return the derivatives of the basis functions instead
+        :return: matrix (len(values) x num_ctrl)
+        """
+        values = np.asarray(values, dtype=float)
+        t = np.atleast_1d(values)[:, np.newaxis]
+        knots = np.array(self.make_knot_vector(self.degree, num_ctrl))
+
+        # degree 0: the knot-span of each value (t=0 -> first span, t=1 -> last span)
+        span = np.searchsorted(knots, t[:, 0], side="right") - 1
+        span = np.clip(span, self.degree, len(knots) - self.degree - 2)
+        basis = np.zeros((len(t), len(knots) - 1))
+        basis[np.arange(len(t)), span] = 1
+
+        for degree in range(1, self.degree + 1):
+            t_this = knots[:-degree-1]
+            t_next = knots[1:-degree]
+            t_precog = knots[degree:-1]
+            t_horizon = knots[degree+1:]
+
+            left = self._reciprocal(t_precog - t_this)
+            right = self._reciprocal(t_horizon - t_next)
+
+            if degree == self.degree and derivative:
+                basis = degree * (left * basis[:, :-1] - right * basis[:, 1:])
+            else:
+                basis = (t - t_this) * left * basis[:, :-1] + (t_horizon - t) * right * basis[:, 1:]
+
+        if derivative and self.degree == 0:
+            basis = np.zeros_like(basis)
+
+        if values.ndim == 0:
+            return basis[0]
+        return basis
+
+    @staticmethod
+    def _reciprocal(values):
+        """1/values, 0 for zero-length knot-spans"""
+        result = np.zeros(len(values))
+        result[values != 0] = 1 / values[values != 0]
+        return result
+
+    def get_matrix(self, num_ctrl, num_samples):
+        """
+        Basis-matrix for num_samples equally spaced parameters (0..1), cached
+        """
+        return get_base_matrix(self, num_ctrl, num_samples)
 
     def make_knot_vector(self, degree, num_points):
         """
@@ -82,4 +82,48 @@ class Translation(Transformation):
             vec = np.zeros(3)
         mat = np.eye(4)
         mat[-1,:len(vec)] = vec
-        super(Translation, self).__init__(mat)
\ No newline at end of file
+        super(Translation, self).__init__(mat)
+
+class TransformationStack(object):
+    '''
+    A stack of n transformations (n x 4 x 4 matrices) applied at once,
+    p.e. to align all ribs of a glider.
+    '''
+    def __init__(self, mats):
+        mats = np.array(mats, dtype=float)
+        assert mats.ndim == 3 and mats.shape[1:] == (4, 4)
+        self.mat = mats
+
+    @classmethod
+    def from_transformations(cls, transformations):
+        return cls([transformation.mat for transformation in transformations])
+
+    def __len__(self):
+        return len(self.mat)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return TransformationStack(self.mat[item])
+        return Transformation(self.mat[item])
+
+    def __iter__(self):
+        for mat in self.mat:
+            yield Transformation(mat)
+
+    def apply(self, vec):
+        """
+        Apply transformation i to the points vec[i]
+        :param vec: (n, m, 2) or (n, m, 3) array
+        :return: (n, m, dim) array
+        """
+        vec = np.asarray(vec, dtype=float)
+        dim = vec.shape[-1]
+        if dim in (2, 3):
+            return np.matmul(vec, self.mat[:, :dim, :dim]) + self.mat[:, np.newaxis, -1, :dim]
+        return np.matmul(vec, self.mat)
+
+    def dot(self, other):
+        return TransformationStack(np.matmul(self.mat, other.mat))
+
+    def __mul__(self, other):
+        return TransformationStack(np.matmul(self.mat, other.mat))
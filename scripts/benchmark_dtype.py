@@ -0,0 +1,49 @@
+import sys
+import time
+
+import numpy as np
+
+import openglider
+from openglider.plots.glider import PlotMaker
+
+# usage: python benchmark_dtype.py glider2d.json [num_midribs] [dtype]
+# compares memory and accuracy of the bulk data (midribs, pattern outlines) with openglider.config.bulk_dtype
+glider_2d = openglider.load(sys.argv[1])
+num_midribs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+dtype = sys.argv[3] if len(sys.argv) > 3 else "float32"
+
+
+def get_outlines(plots):
+    parts = list(plots.panels) + plots.ribs
+    for parts_cell in list(plots.dribs.values()) + list(plots.straps.values()):
+        parts += parts_cell
+    return [line.data for part in parts for layer in part.layers.values() for line in layer]
+
+
+def run(bulk_dtype):
+    openglider.config.bulk_dtype = bulk_dtype
+    try:
+        start = time.time()
+        glider_3d = glider_2d.get_glider_3d()
+        ribs = glider_3d.return_ribs(num_midribs)
+        outlines = get_outlines(PlotMaker(glider_3d).unwrap())
+        return ribs, outlines, time.time() - start
+    finally:
+        openglider.config.bulk_dtype = None
+
+
+def compare(name, reference, values):
+    nbytes_reference = sum(array.nbytes for array in reference)
+    nbytes = sum(array.nbytes for array in values)
+    deviation = max(np.abs(np.asarray(a, dtype=float) - b).max() for a, b in zip(values, reference) if len(b))
+    print("{:<10} {:>12} bytes -> {:>12} bytes ({:.0%}), max deviation: {:.3g}".format(
+        name, nbytes_reference, nbytes, nbytes / nbytes_reference, deviation))
+
+
+ribs_64, outlines_64, time_64 = run(None)
+ribs_bulk, outlines_bulk, time_bulk = run(dtype)
+
+print("float64 -> {} (midribs per cell: {})".format(dtype, num_midribs))
+compare("midribs", ribs_64, ribs_bulk)
+compare("patterns", outlines_64, outlines_bulk)
+print("time: {:.2f}s -> {:.2f}s".format(time_64, time_bulk))
@@ -0,0 +1,17 @@
+import sys
+
+import openglider
+from openglider.plots.glider import PlotMaker
+from openglider.utils.cache import profile_cache
+
+# usage: python cache_report.py glider2d.json [--json]
+glider_2d = openglider.load(sys.argv[1])
+
+with profile_cache() as profile:
+    glider_3d = glider_2d.get_glider_3d()
+    PlotMaker(glider_3d).unwrap()
+
+if "--json" in sys.argv:
+    print(profile.report_json())
+else:
+    print(profile.report())
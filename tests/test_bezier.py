@@ -22,7 +22,11 @@ from __future__ import division
 import unittest
 import random
 
-from openglider.vector.spline import Bezier
+import numpy as np
+
+import openglider.utils.cache
+from openglider.utils.cache import CacheStore, set_cache_store
+from openglider.vector.spline import Bezier, BSpline, BSplineBase
 
 
 class TestBezier(unittest.TestCase):
@@ -43,6 +47,84 @@ class TestBezier(unittest.TestCase):
             self.assertAlmostEqual(p1[0], p2[0], 0)
             self.assertAlmostEqual(p1[1], p2[1], 0)
 
+    def test_call_array(self):
+        values = np.linspace(0, 1, 20)
+        points = self.bezier(values)
+        for value, point in zip(values, points):
+            self.assertTrue(np.allclose(self.bezier(value), point))
+        self.assertTrue(np.allclose(points, self.bezier.get_sequence(20)))
+
+    def test_shared_matrix(self):
+        other = Bezier([[i, 0] for i in range(15)])
+        matrix = self.bezier.get_matrix(30)
+        self.assertIs(other.get_matrix(30), matrix)
+        self.assertFalse(matrix.flags.writeable)
+
+    def test_y_at_x(self):
+        values = np.linspace(0, 1, 30)
+        points = self.bezier(values)
+        y_values = self.bezier.y_at_x(points[:, 0])
+        self.assertTrue(np.allclose(y_values, points[:, 1], atol=1e-9))
+        self.assertIs(self.bezier.y_at_x(points[:, 0]), y_values)
+        self.assertAlmostEqual(self.bezier.y_at_x(points[5, 0]), points[5, 1])
+
+        self.bezier.controlpoints = self.bezier.controlpoints * [1, 2]
+        self.assertTrue(np.allclose(self.bezier.y_at_x(points[:, 0]), 2 * points[:, 1], atol=1e-9))
+
+    def test_x_at_y(self):
+        mirrored = Bezier(self.bezier.data[:, ::-1])
+        x_values = np.linspace(0, 14, 30)
+        self.assertTrue(np.allclose(mirrored.x_at_y(x_values), self.bezier.y_at_x(x_values), atol=1e-9))
+
+    def test_adaptive_sequence(self):
+        tolerance = 1e-3
+        sequence = self.bezier.get_adaptive_sequence(tolerance)
+        self.assertIs(self.bezier.get_adaptive_sequence(tolerance), sequence)
+        self.assertLess(len(sequence), len(self.bezier.get_adaptive_sequence(tolerance / 10)))
+        self.assertTrue(np.allclose(sequence[[0, -1]], self.bezier(np.array([0., 1.]))))
+        points = self.bezier(np.linspace(0, 1, 5000))
+        deviation = np.interp(points[:, 0], sequence[:, 0], sequence[:, 1]) - points[:, 1]
+        self.assertLess(np.abs(deviation).max(), 1.5 * tolerance)
+
+    def test_cache_budget(self):
+        old_store = openglider.utils.cache.cache_store
+        store = CacheStore(max_bytes=8*1000)
+        set_cache_store(store)
+        try:
+            for i in range(200):
+                self.bezier.y_at_x(np.random.random(100) * 14)
+                self.bezier.get_adaptive_sequence(1e-3 * (i + 1))
+            self.assertLessEqual(store.nbytes, 8*1000)
+            self.assertGreater(store.statistics["Bezier._values"]["evictions"], 0)
+        finally:
+            set_cache_store(old_store)
+
+    def test_fit_multiple(self):
+        num = len(self.bezier.controlpoints)
+        curves = [self.bezier.get_sequence(), self.bezier.get_sequence() * 2]
+        fitted = Bezier.fit_multiple(curves, numpoints=num)
+        for curve, bezier in zip(curves, fitted):
+            single = Bezier.fit(curve, numpoints=num)
+            self.assertTrue(np.allclose(bezier.controlpoints, single.controlpoints))
+            self.assertTrue(np.allclose(bezier.controlpoints[0], curve[0]))
+            self.assertTrue(np.allclose(bezier.controlpoints[-1], curve[-1]))
+
+    def test_constraint_fit(self):
+        to_fit = self.bezier.get_sequence(100)
+        constraints = [[None, None] for _ in range(6)]
+        constraints[0] = [0., 1.]
+        constraints[-1][0] = 14.
+        bezier = Bezier.constraint_fit(to_fit, constraints)
+        self.assertTrue(np.allclose(bezier.controlpoints[0], [0., 1.]))
+        self.assertAlmostEqual(bezier.controlpoints[-1][0], 14.)
+
+        # same result as the generic least-square solution
+        matrix = bezier.get_matrix(100)
+        for dim in range(2):
+            fixed = [[index, value[dim]] for index, value in enumerate(constraints) if value[dim] is not None]
+            expected = Bezier.constraint_least_square_sol(matrix, to_fit[:, dim], fixed)
+            self.assertTrue(np.allclose(bezier.controlpoints[:, dim], expected))
+
     def test_length(self):
         self.bezier.controlpoints = [[0, 0], [2, 0]]
         self.assertAlmostEqual(self.bezier.get_length(10), 2.)
@@ -52,6 +134,36 @@ class TestBezier(unittest.TestCase):
         # print(sequence)
 
 
+class TestBSpline(unittest.TestCase):
+    def setUp(self):
+        controlpoints = [[i, random.random()] for i in range(10)]
+        self.bspline = BSpline(controlpoints)
+
+    def test_basis_matrix(self):
+        for degree in range(1, 5):
+            base = BSplineBase(degree)
+            matrix = base.get_matrix(10, 50)
+            # partition of unity
+            self.assertTrue(np.allclose(matrix.sum(axis=1), 1))
+            self.assertIs(BSplineBase(degree).get_matrix(10, 50), matrix)
+            functions = base(10)
+            for row, value in enumerate(np.linspace(0, 1, 50)):
+                self.assertAlmostEqual(functions[3](value), matrix[row, 3])
+
+    def test_endpoints(self):
+        sequence = self.bspline.get_sequence(20)
+        self.assertTrue(np.allclose(sequence[0], self.bspline.controlpoints[0]))
+        self.assertTrue(np.allclose(sequence[-1], self.bspline.controlpoints[-1]))
+
+    def test_y_at_x(self):
+        points = self.bspline(np.linspace(0, 1, 30))
+        self.assertTrue(np.allclose(self.bspline.y_at_x(points[:, 0]), points[:, 1], atol=1e-9))
+
+    def test_fit(self):
+        to_fit = self.bspline.get_sequence(100)
+        bspline2 = BSpline.fit(to_fit, numpoints=10)
+        self.assertTrue(np.allclose(bspline2.get_sequence(100), to_fit, atol=1e-6))
+
 
 if __name__ == '__main__':
     unittest.main(verbosity=2)
\ No newline at end of file
@@ -0,0 +1,357 @@
+#! /usr/bin/python2
+# -*- coding: utf-8; -*-
+#
+# (c) 2013 booya (http://booya.at)
+#
+# This file is part of the OpenGlider project.
+#
+# OpenGlider is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# OpenGlider is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with OpenGlider.  If not, see <http://www.gnu.org/licenses/>.
+from __future__ import division
+
+import copy
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import numpy as np
+
+import openglider.utils.cache
+from openglider.utils.cache import CachedObject, HashedList, cached_property, cached_method, CacheStore, \
+    set_cache_store, profile_cache, defer_invalidation
+from openglider.utils.persistent_cache import DiskCache
+from openglider.vector import PolyLine2D
+
+
+class Parent(CachedObject):
+    def __init__(self, child, factor=1.):
+        self.child = child
+        self.factor = factor
+        self.calls = 0
+
+    @cached_property('child', 'factor')
+    def value(self):
+        self.calls += 1
+        return sum(self.child.data) * self.factor
+
+
+class ArrayParent(CachedObject):
+    def __init__(self, size):
+        self.size = size
+
+    @cached_property('self')
+    def array(self):
+        return np.zeros(self.size)
+
+
+class SlowParent(CachedObject):
+    def __init__(self):
+        self.calls = 0
+
+    @cached_property()
+    def value(self):
+        self.calls += 1
+        time.sleep(0.05)
+        return self.calls
+
+
+class MethodParent(CachedObject):
+    def __init__(self, child):
+        self.child = child
+        self.calls = 0
+
+    @cached_method('child', max_calls=5)
+    def scaled(self, factor):
+        self.calls += 1
+        return np.array(self.child.data) * factor
+
+
+class GrandParent(CachedObject):
+    def __init__(self, parent):
+        self.parent = parent
+
+    @cached_property('parent')
+    def value(self):
+        return self.parent.value * 2
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.child = HashedList([1., 2., 3.])
+        self.parent = Parent(self.child)
+        self.grandparent = GrandParent(self.parent)
+
+    def test_hit(self):
+        self.assertEqual(self.parent.value, 6.)
+        calls = self.parent.calls
+        self.assertEqual(self.parent.value, 6.)
+        self.assertEqual(self.parent.calls, calls)
+
+    def test_attribute_change(self):
+        self.assertEqual(self.parent.value, 6.)
+        self.parent.factor = 2.
+        self.assertEqual(self.parent.value, 12.)
+
+    def test_child_change(self):
+        self.assertEqual(self.grandparent.value, 12.)
+        self.child[0] = 4.
+        self.assertEqual(self.grandparent.value, 18.)
+        self.child.data = [1., 1.]
+        self.assertEqual(self.grandparent.value, 4.)
+
+    def test_replace_child(self):
+        self.assertEqual(self.grandparent.value, 12.)
+        old_child = self.child
+        self.parent.child = HashedList([1.])
+        self.assertEqual(self.grandparent.value, 2.)
+        old_child.data = [10.]
+        self.assertEqual(self.grandparent.value, 2.)
+
+    def test_copy(self):
+        self.assertEqual(self.grandparent.value, 12.)
+        other = copy.deepcopy(self.grandparent)
+        other.parent.child.data = [1.]
+        self.assertEqual(other.value, 2.)
+        self.assertEqual(self.grandparent.value, 12.)
+
+
+class TestDeferInvalidation(unittest.TestCase):
+    def setUp(self):
+        self.children = [HashedList([1., 2.]) for _ in range(3)]
+        self.parent = Parent(self.children[0])
+        self.parent.other = self.children[1]
+        self.grandparent = GrandParent(self.parent)
+
+    def test_defer(self):
+        self.assertEqual(self.grandparent.value, 6.)
+        versions = [child.cache_version for child in self.children]
+        parent_version = self.parent.cache_version
+        with defer_invalidation():
+            for child in self.children:
+                child.data = [2., 2.]
+            self.assertEqual(self.parent.cache_version, parent_version)
+        self.assertTrue(all(child.cache_version != version for child, version in zip(self.children, versions)))
+        self.assertNotEqual(self.parent.cache_version, parent_version)
+        self.assertEqual(self.grandparent.value, 8.)
+
+
+class TestFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.hashed_list = HashedList(np.random.random((5000, 2)))
+
+    def test_equal_content(self):
+        other = HashedList(self.hashed_list.data.copy())
+        self.assertEqual(self.hashed_list.fingerprint, other.fingerprint)
+
+    def test_change_in_the_middle(self):
+        fingerprint = self.hashed_list.fingerprint
+        self.hashed_list[2500] = [2., 2.]
+        self.assertNotEqual(self.hashed_list.fingerprint, fingerprint)
+
+    def test_inplace_change(self):
+        fingerprint = self.hashed_list.fingerprint
+        self.hashed_list.data[100, 0] += 1.
+        self.assertEqual(self.hashed_list.fingerprint, fingerprint)
+        self.hashed_list.invalidate()
+        self.assertNotEqual(self.hashed_list.fingerprint, fingerprint)
+
+
+class TestDtype(unittest.TestCase):
+    def test_set_dtype(self):
+        line = PolyLine2D(np.random.random((10, 2)))
+        data = line.data.copy()
+        fingerprint = line.fingerprint
+        self.assertEqual(line.data.dtype, np.float64)
+        line.set_dtype(np.float32)
+        self.assertEqual(line.data.dtype, np.float32)
+        self.assertNotEqual(line.fingerprint, fingerprint)
+        self.assertTrue(np.allclose(line.data, data))
+        # new data keeps the dtype
+        line.data = data * 2
+        self.assertEqual(line.data.dtype, np.float32)
+        self.assertEqual(line.copy().data.dtype, np.float32)
+
+    def test_set_dtype_none(self):
+        line = PolyLine2D(np.random.random((10, 2)))
+        data = line.data
+        line.set_dtype(None)
+        self.assertIs(line.data, data)
+
+
+class TestCacheStore(unittest.TestCase):
+    def setUp(self):
+        self.old_store = openglider.utils.cache.cache_store
+        self.store = CacheStore(max_bytes=8*250)
+        set_cache_store(self.store)
+
+    def tearDown(self):
+        set_cache_store(self.old_store)
+
+    def test_budget(self):
+        parents = [ArrayParent(100) for _ in range(10)]
+        for parent in parents:
+            parent.array
+        self.assertLessEqual(self.store.nbytes, 8*250)
+        self.assertEqual(self.store.statistics["ArrayParent.array"]["evictions"], 8)
+        # lru: the last ones are still cached
+        parents[-1].array
+        self.assertEqual(self.store.statistics["ArrayParent.array"]["hits"], 1)
+        parents[0].array
+        self.assertEqual(self.store.statistics["ArrayParent.array"]["misses"], 11)
+
+    def test_cached_method(self):
+        parent = MethodParent(HashedList(np.ones(100)))
+        self.assertIs(parent.scaled(2.), parent.scaled(2.))
+        self.assertEqual(parent.calls, 1)
+        for factor in range(20):
+            parent.scaled(factor)
+        self.assertLessEqual(self.store.nbytes, 8*250)
+        self.assertLessEqual(len(parent._cache), 5)
+        # results of the old data are dropped
+        parent.child.data = np.ones(10)
+        self.assertEqual(len(parent.scaled(1.)), 10)
+        self.assertEqual(len(parent._cache), 1)
+
+    def test_clear(self):
+        parent = ArrayParent(10)
+        other = ArrayParent(10)
+        parent.array
+        other.array
+        self.store.clear(parent)
+        self.assertEqual(self.store.nbytes, 80)
+        self.store.clear("array")
+        self.assertEqual(self.store.nbytes, 0)
+
+    def test_forget(self):
+        parent = ArrayParent(10)
+        parent.array
+        del parent
+        self.assertEqual(self.store.nbytes, 0)
+        self.assertEqual(len(self.store.entries), 0)
+
+
+class TestThreads(unittest.TestCase):
+    def setUp(self):
+        self.threadsafe = openglider.config.cache_threadsafe
+        openglider.config.cache_threadsafe = True
+
+    def tearDown(self):
+        openglider.config.cache_threadsafe = self.threadsafe
+
+    def get_values(self, parent):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(parent.value)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_compute_once(self):
+        parent = SlowParent()
+        self.assertEqual(self.get_values(parent), [1] * 8)
+        self.assertEqual(parent.calls, 1)
+        # no locks are kept after the computation
+        self.assertEqual(openglider.utils.cache.cache_store.key_locks, {})
+
+    def test_threadsafe_block(self):
+        openglider.config.cache_threadsafe = False
+        store = openglider.utils.cache.cache_store
+        parent = SlowParent()
+        with store.threadsafe():
+            with store.threadsafe():
+                pass
+            # still thread-safe after an inner block
+            self.assertEqual(self.get_values(parent), [1] * 8)
+        self.assertEqual(parent.calls, 1)
+        self.assertEqual(store._threadsafe_count, 0)
+
+
+class TestCacheProfile(unittest.TestCase):
+    def test_report(self):
+        parent = ArrayParent(10)
+        with profile_cache() as profile:
+            parent.array
+            parent.array
+            parent.invalidate()
+            parent.array
+        parent.array
+
+        record = profile.records["ArrayParent.array"]
+        self.assertEqual(record["hits"], 1)
+        self.assertEqual(record["misses"], 2)
+        self.assertEqual(record["unchanged"], 1)
+        self.assertIn("ArrayParent.array", profile.report())
+        self.assertIn("ArrayParent.array", profile.report_json())
+
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.cache = DiskCache(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_roundtrip(self):
+        value = [PolyLine2D(np.random.random((10, 2)), name="line"), np.arange(5), 1.5]
+        self.cache.save("key", value)
+        loaded = self.cache.load("key")
+        self.assertIsInstance(loaded[0], PolyLine2D)
+        self.assertEqual(loaded[0].name, "line")
+        self.assertTrue(np.array_equal(loaded[0].data, value[0].data))
+        self.assertTrue(np.array_equal(loaded[1], value[1]))
+        self.assertEqual(loaded[2], 1.5)
+        self.assertIsNone(self.cache.load("other_key"))
+
+    def test_damaged(self):
+        self.cache.save("truncated", np.arange(1000))
+        filename = os.path.join(self.path, "truncated.npz")
+        with open(filename, "r+b") as cache_file:
+            cache_file.truncate(os.path.getsize(filename) // 2)
+        self.assertIsNone(self.cache.load("truncated"))
+        self.assertFalse(os.path.exists(filename))
+
+        filename = os.path.join(self.path, "no_structure.npz")
+        np.savez(filename, a=np.arange(5))
+        self.assertIsNone(self.cache.load("no_structure"))
+        self.assertFalse(os.path.exists(filename))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_save_failed(self):
+        savez = np.savez
+        def failing_savez(outfile, **arrays):
+            outfile.write(b"half")
+            raise IOError("disk full")
+        np.savez = failing_savez
+        try:
+            self.assertRaises(IOError, self.cache.save, "key", np.arange(5))
+        finally:
+            np.savez = savez
+        self.assertEqual(os.listdir(self.path), [])
+
+    def test_purge(self):
+        for i in range(10):
+            self.cache.save(str(i), np.zeros(1000))
+        self.assertEqual(len(self.cache), 10)
+        self.cache.purge(self.cache.nbytes // 2)
+        self.assertEqual(len(self.cache), 5)
+        self.cache.purge()
+        self.assertEqual(len(self.cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
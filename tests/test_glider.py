@@ -18,10 +18,13 @@
 # You should have received a copy of the GNU General Public License
 # along with OpenGlider.  If not, see <http://www.gnu.org/licenses/>.
 import random
+import numpy
 import unittest
 
 from common import *
 import openglider.glider
+from openglider.utils.distribution import Distribution
+from openglider.vector.projection import flatten_list, flatten_lists
 
 
 class GliderTestClass(TestCase):
@@ -37,6 +40,15 @@ class TestGlider(GliderTestClass):
         self.glider.profile_numpoints = numpoints
         self.assertEqual(self.glider.profile_numpoints, numpoints)
 
+    def test_profile_x_values(self):
+        x_values = Distribution.from_nose_cos_distribution(random.randint(10, 100), 0.3)
+        other = self.glider.copy()
+        self.glider.profile_x_values = x_values
+        for rib, rib_other in zip(self.glider.ribs, other.ribs):
+            rib_other.profile_2d.x_values = x_values
+            self.assertTrue(numpy.allclose(rib.profile_2d.data, rib_other.profile_2d.data))
+            self.assertEqual(rib.profile_2d.noseindex, rib_other.profile_2d.noseindex)
+
     def test_span(self):
         span = random.random() * 100
         self.glider.span = span
@@ -64,6 +76,28 @@ class TestGlider(GliderTestClass):
         y = random.random()*len(self.glider.cells)
         self.glider.get_midrib(y).flatten()
 
+    def test_flatten_cells(self):
+        cells = self.glider.cells
+        flattened = flatten_lists([cell.prof1 for cell in cells], [cell.prof2 for cell in cells])
+        for cell, (left, right) in zip(cells, flattened):
+            left_single, right_single = flatten_list(cell.prof1, cell.prof2)
+            self.assertTrue(numpy.allclose(left.data, left_single.data))
+            self.assertTrue(numpy.allclose(right.data, right_single.data))
+
+    def test_rib_points(self):
+        profiles, leading_edge, trailing_edge = self.glider.get_rib_points()
+        for rib, profile, front, back in zip(self.glider.ribs, profiles, leading_edge, trailing_edge):
+            self.assertTrue(numpy.allclose(profile, rib.profile_3d.data))
+            self.assertTrue(numpy.allclose(front, rib.align([0, 0, 0])))
+            self.assertTrue(numpy.allclose(back, rib.align([1, 0, 0])))
+
+    def test_threads(self):
+        ribs = self.glider.copy().return_ribs(2)
+        ribs_threaded = self.glider.return_ribs(2, threads=4)
+        self.assertEqual(len(ribs), len(ribs_threaded))
+        for rib, rib_threaded in zip(ribs, ribs_threaded):
+            self.assertTrue(numpy.allclose(rib, rib_threaded))
+
     def copy_complete(self):
         self.glider.copy_complete()
 
@@ -20,6 +20,12 @@ class GliderTestCase2D(TestCase):
         glider = self.glider2d.get_glider_3d()
         self.assertAlmostEqual(glider.span, 2*self.glider2d.shape.span, 2)
 
+    def test_deprecated_num(self):
+        with self.assertWarns(DeprecationWarning):
+            glider = self.glider2d.get_glider_3d(num=50)
+        with self.assertWarns(DeprecationWarning):
+            self.glider2d.apply_aoa(glider, interpolation_num=50)
+
     def test_export(self):
         exp = jsonify.dumps(self.glider2d)
         imp = jsonify.loads(exp)['data']
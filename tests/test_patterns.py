@@ -5,6 +5,8 @@ import os
 import openglider
 import openglider.plots
 import openglider.plots.glider
+from openglider.plots.drawing import PlotPart
+from openglider.vector import PolyLine2D
 from common import TestCase
 
 
@@ -38,5 +40,30 @@ class TestPlots(TestCase):
         dwg = self.plotmaker.get_all_stacked()["ribs"]
         dwg.export_dxf(os.path.join(TEMPDIR, "test_ribs.dxf"))
 
+class TestPlotPart(unittest.TestCase):
+    def setUp(self):
+        self.lines = [PolyLine2D([[0, 0], [1, 0], [1, 2]]), PolyLine2D([[3, 1], [2, 2]])]
+        self.part = PlotPart(cuts=[line.copy() for line in self.lines])
+
+    def test_transform(self):
+        self.part.rotate(0.5)
+        self.part.move([1, 2])
+        self.part.scale(2)
+        for line in self.lines:
+            line.rotate(0.5).move([1, 2]).scale(2)
+
+        points = [p for line in self.lines for p in line]
+        self.assertAlmostEqual(self.part.min_x, min(p[0] for p in points))
+        self.assertAlmostEqual(self.part.max_y, max(p[1] for p in points))
+        for line, part_line in zip(self.lines, self.part.layers["cuts"]):
+            self.assertTrue(all(abs(line.data - part_line.data).flatten() < 1e-10))
+
+    def test_move_to(self):
+        self.part.layers["marks"].append(PolyLine2D([[-1, -1], [0, 0]]))
+        self.part.move_to([0, 0])
+        self.assertAlmostEqual(self.part.min_x, 0)
+        self.assertAlmostEqual(self.part.min_y, 0)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -19,10 +19,12 @@
 # along with OpenGlider.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import shutil
 import tempfile
 import unittest
 from common import import_dir
 from openglider.airfoil import Profile2D
+from openglider.airfoil.library import AirfoilLibrary
 from test_vector import *
 
 TEMPDIR =  tempfile.gettempdir()
@@ -45,6 +47,22 @@ class TestProfile(unittest.TestCase):
         x = random.random() * random.randint(-1, 1)
         self.assertAlmostEqual(abs(x), self.prof.profilepoint(x)[0])
 
+    def test_call_array(self):
+        x_values = np.linspace(-1, 1, 51)
+        iks = self.prof(x_values)
+        self.assertEqual(list(iks), [self.prof(x) for x in x_values])
+        points = self.prof.get_points(iks)
+        self.assertTrue(np.allclose(points[:, 0], np.abs(x_values)))
+        # upper side first
+        self.assertTrue(np.all(points[:25, 1] >= points[50:25:-1, 1]))
+
+    def test_call_changed_data(self):
+        x = random.random()
+        ik = self.prof(x)
+        self.prof.numpoints = 40
+        self.assertAlmostEqual(self.prof[self.prof(x)][0], x)
+        self.assertNotAlmostEqual(self.prof(x), ik)
+
     def test_multiplication(self):
         factor = random.random()
         other = self.prof * factor
@@ -85,6 +103,21 @@ class TestProfile(unittest.TestCase):
         self.prof.camber = camber*val
         self.assertAlmostEqual(self.prof.camber, camber*val)
 
+    def test_metrics(self):
+        prof = Profile2D.compute_naca(naca=2412, numpoints=200)
+        metrics = prof.metrics
+        self.assertIs(prof.copy().metrics, metrics)
+        self.assertAlmostEqual(metrics.max_thickness, 0.12, 3)
+        self.assertAlmostEqual(metrics.max_thickness_position, 0.3, 1)
+        self.assertAlmostEqual(metrics.max_camber, 0.02, 3)
+        self.assertAlmostEqual(metrics.max_camber_position, 0.4, 1)
+        self.assertAlmostEqual(metrics.area, 0.685 * 0.12, 3)
+        self.assertAlmostEqual(metrics.le_radius, 1.1019 * 0.12**2, 2)
+        self.assertGreater(metrics.te_angle, 0)
+        prof.thickness = 0.15
+        self.assertIsNot(prof.metrics, metrics)
+        self.assertAlmostEqual(prof.thickness, 0.15)
+
     def test_contains_point(self):
         allowance = random.random()*0.1
         prof = self.prof.copy()
@@ -106,5 +139,62 @@ class TestProfile(unittest.TestCase):
         print("len2: ", len(self.prof.data), len(self.prof._rootprof.data))
 
 
+
+class TestAirfoilLibrary(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.source = os.path.join(self.path, "dat")
+        os.mkdir(self.source)
+        self.profiles = {}
+        for naca in (12, 2412, 4415, 2418):
+            profile = Profile2D.compute_naca(naca, numpoints=random.randint(30, 100))
+            name = "naca{:04d}".format(naca)
+            profile.export_dat(os.path.join(self.source, name + ".dat"))
+            self.profiles[name] = profile
+        with open(os.path.join(self.source, "broken.dat"), "w") as outfile:
+            outfile.write("no airfoil\n")
+        self.library = AirfoilLibrary.build(self.source, os.path.join(self.path, "library"))
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_lookup(self):
+        self.assertEqual(len(self.library), 4)
+        self.assertEqual(len(self.library.skipped), 1)
+        for name, profile in self.profiles.items():
+            self.assertTrue(np.allclose(self.library[name].data, profile.data))
+        self.assertIsInstance(self.library.points, np.memmap)
+        self.assertRaises(KeyError, self.library.get, "naca0009")
+
+    def test_filter(self):
+        self.assertEqual(self.library.filter(thickness=(0.13, None)), ["naca2418", "naca4415"])
+        self.assertEqual(self.library.filter(thickness=(None, 0.13), camber=(0.01, None)), ["naca2412"])
+        self.assertEqual(self.library.filter(name="naca24*", thickness=(0.13, 0.2)), ["naca2418"])
+
+    def count_points_files(self):
+        return len([name for name in os.listdir(self.library.path) if name.endswith(".npy")])
+
+    def test_rebuild(self):
+        os.remove(os.path.join(self.source, "naca0012.dat"))
+        library = AirfoilLibrary.build(self.source, self.library.path)
+        self.assertNotIn("naca0012", library)
+        self.assertTrue(np.allclose(library["naca4415"].data, self.profiles["naca4415"].data))
+        # the old instance can still be used
+        self.assertTrue(np.allclose(self.library["naca0012"].data, self.profiles["naca0012"].data))
+        self.assertEqual(self.count_points_files(), 2)
+        # only the previous generation is kept
+        AirfoilLibrary.build(self.source, self.library.path)
+        self.assertEqual(self.count_points_files(), 2)
+
+    def test_rebuild_old_index(self):
+        # a reader that loaded the index before the rebuild still finds its points
+        with open(os.path.join(self.library.path, AirfoilLibrary.index_file)) as index_file:
+            old_index = index_file.read()
+        AirfoilLibrary.build(self.source, self.library.path)
+        with open(os.path.join(self.library.path, AirfoilLibrary.index_file), "w") as index_file:
+            index_file.write(old_index)
+        library = AirfoilLibrary(self.library.path, mmap=False)
+        self.assertTrue(np.allclose(library["naca0012"].data, self.profiles["naca0012"].data))
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
@@ -18,8 +18,10 @@
 # You should have received a copy of the GNU General Public License
 # along with OpenGlider.  If not, see <http://www.gnu.org/licenses/>.
 import numpy as np
-from openglider.vector.functions import norm, normalize, rotation_3d
+from openglider.vector.functions import cut, norm, normalize, rotation_3d
 from openglider.vector.polyline import PolyLine, PolyLine2D
+from openglider.vector.interpolate import Interpolation
+from openglider.vector.transformation import Rotation, Translation, TransformationStack
 
 
 __author__ = 'simon'
@@ -93,6 +95,32 @@ class TestVector3D(unittest.TestCase):
                                    "\nresult: i2=" + str(new) + " leng2=" + str(leng2) +
                                    " dist=" + str(norm(thalist[start] - thalist[new])))
 
+    def test_extend_batch(self):
+        for thalist in self.vectors:
+            start = random.random() * self.numpoints
+            lengths = np.random.random(20) * 200 - 100
+            iks = thalist.extend(start, lengths)
+            for length, ik in zip(lengths, iks):
+                self.assertAlmostEqual(thalist.get_length(start, ik), abs(length))
+            self.assertTrue(np.allclose(thalist.get_ik_at_length(thalist.get_arc_length(iks)), iks))
+
+    def test_get_points(self):
+        for thalist in self.vectors:
+            iks = [-5.5, -1, 0, random.random() * self.numpoints, self.numpoints - 1.,
+                   self.numpoints + random.random() * 50]
+            points = thalist.get_points(iks)
+            for ik, point in zip(iks, points):
+                self.assertTrue(np.allclose(thalist[ik], point))
+
+    def test_slice(self):
+        for thalist in self.vectors:
+            start = random.random() * self.numpoints / 2
+            stop = start + random.random() * self.numpoints / 2
+            part = thalist[start:stop]
+            self.assertTrue(np.allclose(part[0], thalist[start]))
+            self.assertTrue(np.allclose(part[len(part)-1], thalist[stop]))
+            self.assertEqual(len(part), len(thalist.get_positions(start, stop)))
+
 
 class TestVector2D(TestVector3D):
     def setUp(self, dim=2):
@@ -105,6 +133,14 @@ class TestVector2D(TestVector3D):
         for thalist in self.vectors:
             thalist.check()
 
+    def test_check_loop(self):
+        line = PolyLine2D([[-1, 0], [0, 0], [2, 0], [2, 1], [1, 1], [1, -1], [1, -2], [3, -2]]).check()
+        self.assertTrue(np.allclose(line.data, [[-1, 0], [1, 0], [1, -1], [1, -2], [3, -2]]))
+
+    def test_check_duplicates(self):
+        line = PolyLine2D([[0, 0], [1, 0], [1, 0], [2, 0]]).check()
+        self.assertEqual(len(line), 3)
+
     def test_normvectors(self):
         for thalist in self.vectors:
             i = random.randint(1, len(thalist)-3)  # TODO: Fix for other values
@@ -116,6 +152,19 @@ class TestVector2D(TestVector3D):
             amount = random.random()
             thalist.add_stuff(amount)
 
+    def test_shift_multiple(self):
+        amounts = [random.random() - 0.5 for _ in self.vectors]
+        singles = [thalist.copy().add_stuff(amount) for thalist, amount in zip(self.vectors, amounts)]
+        PolyLine2D.add_stuff_multiple(self.vectors, amounts)
+        for single, thalist in zip(singles, self.vectors):
+            self.assertTrue(np.allclose(single.data, thalist.data))
+
+    def test_shift_corner(self):
+        line = PolyLine2D([[0, 0], [1, 0], [1, 1]]).add_stuff(0.1)
+        self.assertTrue(np.allclose(line.data, [[0, -0.1], [1.1, -0.1], [1.1, 1]]))
+        line = PolyLine2D([[0, 0], [1, 0], [0, 0]]).add_stuff(0.1)  # reversal
+        self.assertTrue(np.allclose(line.data, [[0, -0.1], [1, -0.1], [1, 0.1], [0, 0.1]]))
+
     def test_Cut(self):
         for thalist in self.vectors:
             i = random.randint(1, len(thalist)-3)
@@ -129,6 +178,63 @@ class TestVector2D(TestVector3D):
             neu = thalist.cut(p1, p2, i - 1)
             #self.assertAlmostEqual(i, neu[1])
 
+    def test_cut_with_polyline(self):
+        line_1 = PolyLine2D([[0, 0], [1, 1], [2, 0], [3, 1]])
+        line_2 = PolyLine2D([[0, 0.5], [3, 0.5]])
+        cuts = list(line_1.cut_with_polyline(line_2))
+        self.assertEqual(len(cuts), 3)
+        for ik1, ik2 in cuts:
+            self.assertTrue(np.allclose(line_1[ik1], line_2[ik2]))
+        self.assertAlmostEqual(cuts[0][0], 0.5)
+
+    def test_cut_with_polyline_vertex(self):
+        line_1 = PolyLine2D([[0, 0], [1, 0], [2, 0]])
+        line_2 = PolyLine2D([[1, -1], [1, 1]])
+        self.assertEqual(list(line_1.cut_with_polyline(line_2)), [(1., 0.5)])
+        self.assertEqual(list(line_2.cut_with_polyline(line_1)), [(0.5, 1.)])
+
+        line_3 = PolyLine2D([[0, -1], [1, 0], [2, 1]])
+        ik1, ik2 = line_1.get_intersections(line_3)
+        self.assertEqual(list(ik1), [1.])
+        self.assertEqual(list(ik2), [1.])
+
+    def test_intersections(self):
+        for thalist, other in zip(self.vectors[:5], self.vectors[5:10]):
+            ik1, ik2 = thalist.get_intersections(other)
+            count = 0
+            for i in range(len(thalist) - 1):
+                for j in range(len(other) - 1):
+                    try:
+                        _, k, l = cut(thalist[i], thalist[i+1], other[j], other[j+1])
+                    except np.linalg.LinAlgError:
+                        continue
+                    if (0 < k <= 1 or k == i == 0) and (0 < l <= 1 or l == j == 0):
+                        count += 1
+            self.assertEqual(len(ik1), count)
+            self.assertTrue(np.allclose(thalist.get_points(ik1), other.get_points(ik2)))
+
+class TestInterpolation(unittest.TestCase):
+    def setUp(self):
+        self.interpolation = Interpolation([[0, 0], [1, 1], [2, 0], [4, 2]])
+
+    def test_values(self):
+        for x, y in ((0.5, 0.5), (1.5, 0.5), (3, 1), (-1, -1), (5, 3)):
+            self.assertAlmostEqual(self.interpolation(x), y)
+
+    def test_array(self):
+        x_values = np.linspace(-1, 5, 50)
+        values = self.interpolation(x_values)
+        self.assertEqual(values.shape, x_values.shape)
+        for x, value in zip(x_values, values):
+            self.assertAlmostEqual(self.interpolation(x), value)
+
+    def test_no_extrapolation(self):
+        self.interpolation.extrapolate = False
+        self.assertAlmostEqual(self.interpolation(3), 1)
+        self.assertRaises(Exception, self.interpolation, 5)
+        self.assertRaises(Exception, self.interpolation, [1.5, -1])
+
+
 class TestVectorFunctions3D(unittest.TestCase):
     def setUp(self):
         self.vectors = [
@@ -160,6 +266,14 @@ class TestVectorFunctions3D(unittest.TestCase):
                 for i in range(3):
                     self.assertAlmostEqual(p1[i], p2[i])
 
+    def test_transformation_stack(self):
+        transformations = [Rotation(random.random(), axis) * Translation(axis) for axis in self.vectors[:10]]
+        stack = TransformationStack.from_transformations(transformations)
+        points = np.random.random((10, 20, 3))
+        result = stack.apply(points)
+        for transformation, vectors, vectors_stack in zip(transformations, points, result):
+            self.assertTrue(np.allclose(transformation.apply(vectors), vectors_stack))
+
 
 
 